@@ -1,55 +1,15 @@
-import gymnasium as gym
-from stable_baselines3 import PPO
-from stable_baselines3.common.env_util import make_vec_env
-from stable_baselines3.common.vec_env import SubprocVecEnv
 import argparse
-import os
 
-import hurry_taxi
-
-
-def make_env():
-    env = gym.make(
-        "hurry_taxi/TaxiGrid-v0",
-        max_steps=args.steps,
-        agents_number=args.agents,
-        npc_number=args.npcs,
-        grid_size=args.size,
-    )
-    return env
+from training import VEC_ENVS, add_env_arguments, make_config, train
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-
-    parser.add_argument("--steps", type=int, default=1000, required=False)
+    add_env_arguments(parser)
     parser.add_argument(
-        "--size", type=int, default=25, required=False, choices=[5, 10, 25]
+        "--vec-env", type=str, default="subproc", required=False, choices=VEC_ENVS
     )
-    parser.add_argument("--agents", type=int, default=4, required=False)
-    parser.add_argument("--npcs", type=int, default=4, required=False)
 
     args = parser.parse_args()
 
-    model_name = f"ppo_{args.size}_{args.steps}_{args.agents}_{args.npcs}"
-    folder_name = os.path.join("logs", model_name)
-    os.makedirs(folder_name, exist_ok=True)
-
-    env = make_vec_env(
-        make_env,
-        n_envs=16,
-        vec_env_cls=SubprocVecEnv,
-        monitor_dir=folder_name,
-    )
-
-    model = PPO(
-        "MlpPolicy",
-        env,
-        verbose=1,
-        gamma=0.99,
-        learning_rate=0.00001,
-        device="cpu",
-        policy_kwargs=dict(net_arch=[256, 256]),
-    )
-    model.learn(total_timesteps=15000000, log_interval=10)
-    model.save(os.path.join("models", model_name))
+    train(make_config("ppo", args.steps, args.size, args.agents, args.npcs, vec_env=args.vec_env))
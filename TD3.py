@@ -1,37 +1,23 @@
-import gymnasium as gym
-from stable_baselines3 import TD3
-from stable_baselines3.common.monitor import Monitor
-from stable_baselines3.common.noise import NormalActionNoise, OrnsteinUhlenbeckActionNoise
-import numpy as np
 import argparse
-import os
-import hurry_taxi
-
-parser = argparse.ArgumentParser()
-parser.add_argument("--steps", type=int, default=1000, required=False)
-parser.add_argument("--size", type=int, default=25, required=False, choices=[5, 10, 25])
-parser.add_argument("--agents", type=int, default=4, required=False)
-parser.add_argument("--npcs", type=int, default=4, required=False)
-args = parser.parse_args()
-
-filename = f"td3_{args.size}_{args.steps}_{args.agents}_{args.npcs}"
-
-env = gym.make(
-    "hurry_taxi/TaxiGrid-v0", 
-    max_steps=args.steps, 
-    agents_number=args.agents, 
-    npc_number=args.npcs,
-    grid_size=args.size
-)
-
-n_actions = env.action_space.shape[-1]
-action_noise = OrnsteinUhlenbeckActionNoise(mean=np.zeros(n_actions), sigma=0.01 * np.ones(n_actions))
-
-env = Monitor(env, filename=os.path.join("logs", filename))
-obs, info = env.reset()
-
-
-model = TD3("MlpPolicy", env, verbose=1)
-model.learn(total_timesteps=25*args.steps, log_interval=10)
-model.save(os.path.join("models", filename))
 
+from training import add_env_arguments, add_off_policy_arguments, make_config, train
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_env_arguments(parser)
+    add_off_policy_arguments(parser)
+    args = parser.parse_args()
+
+    config = make_config(
+        "td3",
+        args.steps,
+        args.size,
+        args.agents,
+        args.npcs,
+        num_envs=args.num_envs,
+        train_freq=args.train_freq,
+        gradient_steps=args.gradient_steps,
+        action_noise=args.action_noise,
+    )
+    train(config)
@@ -3,4 +3,5 @@ from gymnasium.envs.registration import register
 register(
     id="hurry_taxi/TaxiGrid-v0",
     entry_point="hurry_taxi.envs:TaxiGridEnv",
-)
\ No newline at end of file
+    vector_entry_point="hurry_taxi.envs:TaxiGridVectorEnv",
+)
@@ -0,0 +1,46 @@
+import argparse
+import sys
+
+from hurry_taxi.benchmarks.suite import (
+    GRID_SIZES,
+    POPULATIONS,
+    VECTOR_BACKENDS,
+    compare,
+    format_record,
+    load_records,
+    run,
+    save_records,
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m hurry_taxi.benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=GRID_SIZES, required=False)
+    parser.add_argument("--populations", type=str, nargs="+", required=False,
+                        default=[f"{agents}x{npcs}" for agents, npcs in POPULATIONS],
+                        help="agents x npcs pairs, as 2x4")
+    parser.add_argument("--backends", type=str, nargs="+", default=VECTOR_BACKENDS, required=False,
+                        choices=VECTOR_BACKENDS)
+    parser.add_argument("--num-envs", type=int, default=8, required=False)
+    parser.add_argument("--seconds", type=float, default=1.0, required=False,
+                        help="time spent on each measurement")
+    parser.add_argument("--output", type=str, nargs="+", default=[], required=False,
+                        help="result files, .json or .csv")
+    parser.add_argument("--baseline", type=str, default=None, required=False,
+                        help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, required=False,
+                        help="slowdown over the baseline reported as a regression")
+    args = parser.parse_args()
+
+    populations = [tuple(int(count) for count in pair.split("x")) for pair in args.populations]
+    records = run(args.sizes, populations, args.backends, args.num_envs, args.seconds)
+    for path in args.output:
+        save_records(records, path)
+
+    if args.baseline is not None:
+        print(f"\nCompared with {args.baseline}")
+        regressions = 0
+        for result, ratio, regressed in compare(records, load_records(args.baseline), args.tolerance):
+            regressions += regressed
+            print(format_record(result, ratio) + ("  REGRESSION" if regressed else ""))
+        print(f"{regressions} regression(s) beyond {args.tolerance:.0%}")
+        sys.exit(1 if regressions else 0)
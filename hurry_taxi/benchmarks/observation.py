@@ -0,0 +1,60 @@
+import argparse
+import time
+
+import numpy as np
+
+from hurry_taxi.envs.taxi_grid import TaxiGridEnv
+
+
+def dict_list_obs(max_passengers, agents, npcs, waiting_passengers):
+    # Observation builder used when agents, NPCs and waiting passengers were
+    # stored as lists of dicts, before the preallocated buffer
+    return np.concatenate([
+        np.array([agent["location"] for agent in agents]).flatten(),
+        np.array([agent["direction"].value for agent in agents]),
+        np.array([agent["has_passenger"] for agent in agents]),
+        np.array([agent["passenger"]["destination"] if agent["has_passenger"] else [0, 0] for agent in agents]).flatten(),
+        np.array([npc["location"] for npc in npcs]).flatten(),
+        np.array([npc["direction"].value for npc in npcs]),
+        np.array([1 if idx < len(waiting_passengers) else 0 for idx in range(max_passengers)]),
+        np.array([waiting_passengers[idx]["location"] if idx < len(waiting_passengers) else [0, 0]
+                  for idx in range(max_passengers)]).flatten()
+    ], dtype=np.float32)
+
+
+def time_per_call(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def run(agents_numbers, grid_size, npc_number, repeats):
+    results = []
+    for agents_number in agents_numbers:
+        env = TaxiGridEnv(grid_size=grid_size, agents_number=agents_number, npc_number=npc_number)
+        env.reset(seed=0)
+        # The old env kept these lists as its state, so they are built once
+        # and only the builder is timed
+        state = (env.max_passengers, env._agents, env.npcs, env._waiting_passengers)
+        assert np.array_equal(dict_list_obs(*state), env._get_obs())
+
+        before = time_per_call(lambda: dict_list_obs(*state), repeats)
+        env.copy_obs = True
+        copy = time_per_call(env._get_obs, repeats)
+        env.copy_obs = False
+        view = time_per_call(env._get_obs, repeats)
+        results.append((agents_number, before, copy, view))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=25, required=False, choices=[5, 10, 25])
+    parser.add_argument("--npcs", type=int, default=4, required=False)
+    parser.add_argument("--repeats", type=int, default=100000, required=False)
+    args = parser.parse_args()
+
+    print("agents  dict lists (us)  buffer copy (us)  buffer view (us)")
+    for agents_number, before, copy, view in run([1, 4, 16], args.size, args.npcs, args.repeats):
+        print(f"{agents_number:>6}  {before * 1e6:>15.2f}  {copy * 1e6:>16.2f}  {view * 1e6:>16.2f}")
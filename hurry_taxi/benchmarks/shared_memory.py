@@ -0,0 +1,53 @@
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+from stable_baselines3.common.vec_env import SubprocVecEnv
+
+from hurry_taxi.envs.taxi_grid import TaxiGridEnv
+from hurry_taxi.vector.shared_memory import SharedMemoryVecEnv
+
+
+def steps_per_second(envs, steps):
+    envs.seed(0)
+    envs.reset()
+    actions = np.stack([envs.action_space.sample() for _ in range(envs.num_envs)])
+    envs.step(actions)
+    start = time.perf_counter()
+    for _ in range(steps):
+        envs.step(actions)
+    rate = envs.num_envs * steps / (time.perf_counter() - start)
+    envs.close()
+    return rate
+
+
+def run(worker_counts, grid_size, agents_number, npc_number, steps):
+    env_kwargs = dict(grid_size=grid_size, agents_number=agents_number, npc_number=npc_number)
+    results = []
+    for num_workers in worker_counts:
+        subproc = steps_per_second(
+            SubprocVecEnv([lambda: TaxiGridEnv(**env_kwargs) for _ in range(num_workers)]), steps
+        )
+        shared = steps_per_second(SharedMemoryVecEnv(num_workers, **env_kwargs), steps)
+        results.append((num_workers, subproc, shared))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=25, required=False, choices=[5, 10, 25])
+    parser.add_argument("--agents", type=int, default=4, required=False)
+    parser.add_argument("--npcs", type=int, default=4, required=False)
+    parser.add_argument("--steps", type=int, default=500, required=False)
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 16, 64], required=False)
+    args = parser.parse_args()
+
+    # Workers of both env types fork from a server that imported their modules
+    # once. Otherwise each SubprocVecEnv worker imports torch through
+    # Stable-Baselines3 on its own, which at 64 workers runs out of memory.
+    mp.set_forkserver_preload(["stable_baselines3.common.vec_env.subproc_vec_env", "hurry_taxi.envs.shared_memory_worker"])
+
+    print("workers  SubprocVecEnv (steps/s)  SharedMemoryVecEnv (steps/s)")
+    for num_workers, subproc, shared in run(args.workers, args.size, args.agents, args.npcs, args.steps):
+        print(f"{num_workers:>7}  {subproc:>23,.0f}  {shared:>28,.0f}")
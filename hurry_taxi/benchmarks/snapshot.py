@@ -0,0 +1,43 @@
+import argparse
+import copy
+import time
+
+from hurry_taxi.envs.taxi_grid import TaxiGridEnv
+
+
+def calls_per_second(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return repeats / (time.perf_counter() - start)
+
+
+def run(agents_numbers, grid_size, npc_number, warmup_steps, repeats):
+    results = []
+    for agents_number in agents_numbers:
+        env = TaxiGridEnv(grid_size=grid_size, agents_number=agents_number, npc_number=npc_number)
+        env.reset(seed=0)
+        for _ in range(warmup_steps):
+            env.step(env.action_space.sample())
+        state = env.get_state()
+
+        snapshots = calls_per_second(env.get_state, repeats)
+        restores = calls_per_second(lambda: env.set_state(state), repeats)
+        deepcopies = calls_per_second(lambda: copy.deepcopy(env), max(repeats // 100, 1))
+        results.append((agents_number, len(state), snapshots, restores, deepcopies))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=25, required=False)
+    parser.add_argument("--npcs", type=int, default=4, required=False)
+    parser.add_argument("--warmup-steps", type=int, default=100, required=False)
+    parser.add_argument("--repeats", type=int, default=100000, required=False)
+    args = parser.parse_args()
+
+    print("agents  bytes  get_state (/s)  set_state (/s)  deepcopy (/s)")
+    for agents_number, size, snapshots, restores, deepcopies in run(
+        [1, 4, 16], args.size, args.npcs, args.warmup_steps, args.repeats
+    ):
+        print(f"{agents_number:>6}  {size:>5}  {snapshots:>14.0f}  {restores:>14.0f}  {deepcopies:>13.0f}")
@@ -0,0 +1,59 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Each measurement runs in a fresh interpreter so no module is cached
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import hurry_taxi
+imported = time.perf_counter()
+import gymnasium as gym
+env = gym.make("hurry_taxi/TaxiGrid-v0", grid_size={grid_size})
+env.reset(seed=0)
+made = time.perf_counter()
+print(json.dumps({{
+    "import": imported - start,
+    "make": made - imported,
+    "pygame_loaded": "pygame" in sys.modules,
+}}))
+"""
+
+PYGAME_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import pygame
+print(json.dumps({"import": time.perf_counter() - start}))
+"""
+
+
+def run_script(script):
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    # pygame prints a banner when it is imported, results are on the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(grid_size, runs):
+    startups = [run_script(STARTUP_SCRIPT.format(grid_size=grid_size)) for _ in range(runs)]
+    pygame_imports = [run_script(PYGAME_SCRIPT)["import"] for _ in range(runs)]
+    return {
+        "import": statistics.median(result["import"] for result in startups),
+        "make": statistics.median(result["make"] for result in startups),
+        "pygame_loaded": any(result["pygame_loaded"] for result in startups),
+        "pygame_import": statistics.median(pygame_imports),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=25, required=False)
+    parser.add_argument("--runs", type=int, default=5, required=False)
+    args = parser.parse_args()
+
+    result = run(args.size, args.runs)
+    print(f"import hurry_taxi        {result['import'] * 1e3:8.1f} ms")
+    print(f"gym.make + reset         {result['make'] * 1e3:8.1f} ms")
+    print(f"pygame loaded            {result['pygame_loaded']!s:>8}")
+    print(f"import pygame (for ref.) {result['pygame_import'] * 1e3:8.1f} ms")
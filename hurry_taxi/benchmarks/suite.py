@@ -0,0 +1,181 @@
+import csv
+import json
+import os
+import time
+
+import gymnasium as gym
+import numpy as np
+
+from hurry_taxi.envs.taxi_grid import TaxiGridEnv
+from hurry_taxi.envs.taxi_grid_vector import TaxiGridVectorEnv
+
+GRID_SIZES = [5, 10, 25]
+# (agents, npcs)
+POPULATIONS = [(1, 1), (2, 4), (8, 16)]
+VECTOR_BACKENDS = ["sync", "subproc", "batched"]
+FIELDS = ["benchmark", "backend", "grid_size", "agents", "npcs", "num_envs", "render_mode", "rate", "unit"]
+
+
+def calls_per_second(function, seconds):
+    # Repeats function for at least the given time after one warmup call
+    function()
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return calls / elapsed
+
+
+def record(benchmark, backend, env_kwargs, num_envs, rate, unit, render_mode=None):
+    return {
+        "benchmark": benchmark,
+        "backend": backend,
+        "grid_size": env_kwargs["grid_size"],
+        "agents": env_kwargs["agents_number"],
+        "npcs": env_kwargs["npc_number"],
+        "num_envs": num_envs,
+        "render_mode": render_mode or "none",
+        "rate": rate,
+        "unit": unit,
+    }
+
+
+def single_env_records(env_kwargs, seconds):
+    env = TaxiGridEnv(**env_kwargs)
+    env.reset(seed=0)
+    action = env.action_space.sample()
+    steps = calls_per_second(lambda: env.step(action), seconds)
+    resets = calls_per_second(env.reset, seconds)
+    env.close()
+    return [
+        record("step", "single", env_kwargs, 1, steps, "steps/s"),
+        record("reset", "single", env_kwargs, 1, resets, "resets/s"),
+    ]
+
+
+def render_record(env_kwargs, seconds):
+    # Human mode is left out, its frame rate is capped by the render clock
+    env = TaxiGridEnv(render_mode="rgb_array", **env_kwargs)
+    env.reset(seed=0)
+    frames = calls_per_second(env.render, seconds)
+    env.close()
+    return record("render", "single", env_kwargs, 1, frames, "frames/s", "rgb_array")
+
+
+def make_vector_env(backend, num_envs, env_kwargs):
+    if backend == "sync":
+        return gym.vector.SyncVectorEnv([lambda: TaxiGridEnv(**env_kwargs) for _ in range(num_envs)])
+    if backend == "subproc":
+        from stable_baselines3.common.vec_env import SubprocVecEnv
+
+        return SubprocVecEnv([lambda: TaxiGridEnv(**env_kwargs) for _ in range(num_envs)])
+    if backend == "batched":
+        return TaxiGridVectorEnv(num_envs, **env_kwargs)
+    raise ValueError(f"Unknown vector backend {backend}")
+
+
+def vector_record(backend, num_envs, env_kwargs, seconds):
+    envs = make_vector_env(backend, num_envs, env_kwargs)
+    if backend == "subproc":
+        envs.seed(0)
+        envs.reset()
+        actions = np.stack([envs.action_space.sample() for _ in range(num_envs)])
+    else:
+        envs.reset(seed=0)
+        actions = envs.action_space.sample()
+    steps = num_envs * calls_per_second(lambda: envs.step(actions), seconds)
+    envs.close()
+    return record("step", backend, env_kwargs, num_envs, steps, "steps/s")
+
+
+def run(grid_sizes=GRID_SIZES, populations=POPULATIONS, backends=VECTOR_BACKENDS, num_envs=8, seconds=1.0, log=print):
+    """Runs every benchmark and returns one record per measurement.
+
+    Single envs are stepped and reset for every grid size and population,
+    and rendered at every grid size. Vector backends are stepped at every
+    grid size with the middle population.
+    """
+    records = []
+
+    def add(new_record):
+        records.append(new_record)
+        if log is not None:
+            log(format_record(new_record))
+
+    for grid_size in grid_sizes:
+        for agents_number, npc_number in populations:
+            env_kwargs = dict(grid_size=grid_size, agents_number=agents_number, npc_number=npc_number)
+            for new_record in single_env_records(env_kwargs, seconds):
+                add(new_record)
+
+        agents_number, npc_number = populations[len(populations) // 2]
+        env_kwargs = dict(grid_size=grid_size, agents_number=agents_number, npc_number=npc_number)
+        add(render_record(env_kwargs, seconds))
+        for backend in backends:
+            add(vector_record(backend, num_envs, env_kwargs, seconds))
+    return records
+
+
+def record_key(result):
+    return tuple(result[field] for field in FIELDS if field not in ("rate", "unit"))
+
+
+def format_record(result, ratio=None):
+    line = (
+        f"{result['benchmark']:<7} {result['backend']:<8} size={result['grid_size']:<3} "
+        f"agents={result['agents']:<3} npcs={result['npcs']:<3} envs={result['num_envs']:<4} "
+        f"render={result['render_mode']:<9} {result['rate']:>12,.0f} {result['unit']}"
+    )
+    if ratio is not None:
+        line += f"  x{ratio:.2f} of baseline"
+    return line
+
+
+def save_records(records, path):
+    # Format follows the file extension, .csv or .json
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+    else:
+        with open(path, "w") as file:
+            json.dump(records, file, indent=2)
+
+
+def load_records(path):
+    if path.endswith(".csv"):
+        with open(path, newline="") as file:
+            records = list(csv.DictReader(file))
+        for result in records:
+            for field in ("grid_size", "agents", "npcs", "num_envs"):
+                result[field] = int(result[field])
+            result["rate"] = float(result["rate"])
+        return records
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(records, baseline, tolerance=0.1):
+    """Pairs each record with its baseline rate.
+
+    Returns (record, ratio, regressed) tuples, where ratio is None for
+    records missing from the baseline and regressed marks rates more than
+    tolerance below it.
+    """
+    baseline_rates = {record_key(result): result["rate"] for result in baseline}
+    comparisons = []
+    for result in records:
+        baseline_rate = baseline_rates.get(record_key(result))
+        if baseline_rate is None:
+            comparisons.append((result, None, False))
+            continue
+        ratio = result["rate"] / baseline_rate
+        comparisons.append((result, ratio, ratio < 1 - tolerance))
+    return comparisons
@@ -0,0 +1,41 @@
+import argparse
+import time
+
+import gymnasium as gym
+
+from hurry_taxi.envs.taxi_grid import TaxiGridEnv
+from hurry_taxi.envs.taxi_grid_vector import TaxiGridVectorEnv
+
+
+def steps_per_second(envs, steps):
+    envs.reset(seed=0)
+    actions = envs.action_space.sample()
+    envs.step(actions)
+    start = time.perf_counter()
+    for _ in range(steps):
+        envs.step(actions)
+    return envs.num_envs * steps / (time.perf_counter() - start)
+
+
+def run(batch_sizes, grid_size, agents_number, npc_number, steps):
+    env_kwargs = dict(grid_size=grid_size, agents_number=agents_number, npc_number=npc_number)
+    results = []
+    for num_envs in batch_sizes:
+        sync_envs = gym.vector.SyncVectorEnv([lambda: TaxiGridEnv(**env_kwargs) for _ in range(num_envs)])
+        sync = steps_per_second(sync_envs, max(1, steps // num_envs))
+        batched = steps_per_second(TaxiGridVectorEnv(num_envs, **env_kwargs), steps)
+        results.append((num_envs, sync, batched))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=5, required=False, choices=[5, 10, 25])
+    parser.add_argument("--agents", type=int, default=1, required=False)
+    parser.add_argument("--npcs", type=int, default=1, required=False)
+    parser.add_argument("--steps", type=int, default=200, required=False)
+    args = parser.parse_args()
+
+    print("num_envs  SyncVectorEnv (steps/s)  TaxiGridVectorEnv (steps/s)")
+    for num_envs, sync, batched in run([16, 256, 4096], args.size, args.agents, args.npcs, args.steps):
+        print(f"{num_envs:>8}  {sync:>23,.0f}  {batched:>27,.0f}")
@@ -1 +1,2 @@
 from hurry_taxi.envs.taxi_grid import TaxiGridEnv
+from hurry_taxi.envs.taxi_grid_vector import TaxiGridVectorEnv
@@ -0,0 +1,143 @@
+import numpy as np
+import pygame
+
+from hurry_taxi.envs import sprite_cache
+from hurry_taxi.envs.road_map import ROAD_TYPES
+from hurry_taxi.envs.taxi_grid import Actions, HAIRS, NPC_COLORS, SHIRTS
+
+DESTINATION_COLOR = np.array([255, 0, 0], dtype=np.uint8)
+
+# Atlases are shared by every renderer in the process, keyed by tile size
+_atlases = {}
+
+
+def rasterize(path, angle, size):
+    # Decoding and resampling happen once per atlas and do not need a display
+    image = pygame.image.load(path)
+    surface = pygame.Surface(image.get_size(), pygame.SRCALPHA, 32)
+    surface.blit(image, (0, 0))
+    if angle:
+        surface = pygame.transform.rotate(surface, angle)
+    surface = pygame.transform.smoothscale(surface, size)
+    rgb = np.ascontiguousarray(pygame.surfarray.array3d(surface).transpose(1, 0, 2))
+    alpha = np.ascontiguousarray(pygame.surfarray.array_alpha(surface).T)
+    return rgb, alpha
+
+
+class SpriteAtlas:
+    def __init__(self, tile_size):
+        self.tile_size = tile_size
+        half = tile_size // 2
+        quarter = tile_size // 4
+
+        self.roads = {
+            name: rasterize(path, 0, (tile_size, tile_size))
+            for name, path in sprite_cache.ROAD_ASSETS.items()
+        }
+
+        # Same layout as the pygame renderer: (angle, size, offset) per direction
+        # value, with sizes given as (width, height) and offsets as (x, y)
+        car_layouts = {
+            0: (-90, (tile_size, half), (0, half)),
+            1: (0, (half, tile_size), (half, 0)),
+            2: (90, (tile_size, half), (0, 0)),
+            3: (180, (half, tile_size), (0, 0)),
+        }
+        self.cars = {}
+        for name, path in sprite_cache.CAR_ASSETS.items():
+            for direction, (angle, size, offset) in car_layouts.items():
+                rgb, alpha = rasterize(path, angle, size)
+                self.cars[(name, direction)] = (offset, rgb, alpha >= 128)
+
+        passenger_layouts = {
+            "right": (90, (half, quarter)),
+            "up": (180, (quarter, 0)),
+            "left": (-90, (0, quarter)),
+            "down": (0, (quarter, half)),
+        }
+        self.characters = {}
+        for name, path in sprite_cache.CHARACTER_ASSETS.items():
+            for side, (angle, offset) in passenger_layouts.items():
+                rgb, alpha = rasterize(path, angle, (half, half))
+                self.characters[(name, side)] = (offset, rgb, alpha >= 128)
+
+        border = max(1, round(tile_size / 20))
+        self.destination = np.ones((tile_size, tile_size), dtype=bool)
+        self.destination[border:-border, border:-border] = False
+
+
+def get_atlas(tile_size):
+    atlas = _atlases.get(tile_size)
+    if atlas is None:
+        atlas = SpriteAtlas(tile_size)
+        _atlases[tile_size] = atlas
+    return atlas
+
+
+class ArrayRenderer:
+    def __init__(self, env, resolution):
+        self.grid_size = env.grid_size
+        self.resolution = resolution
+        self.tile_size = max(4, -(-resolution // self.grid_size))
+        self.atlas = get_atlas(self.tile_size)
+
+        canvas_size = self.grid_size * self.tile_size
+        self.background = self._render_static_layer(env)
+        self.canvas = np.empty_like(self.background)
+        self.frame = np.empty((resolution, resolution, 3), dtype=np.uint8)
+        if canvas_size != resolution:
+            # Nearest-neighbour resampling from the tile-aligned canvas
+            self.index = (np.arange(resolution) * 2 + 1) * canvas_size // (2 * resolution)
+            self.rows = np.empty((resolution, canvas_size, 3), dtype=np.uint8)
+        else:
+            self.index = None
+
+    def _render_static_layer(self, env):
+        tile_size = self.tile_size
+        grass, _ = self.atlas.roads["grass"]
+        background = np.tile(grass, (self.grid_size, self.grid_size, 1)).astype(np.float32)
+        for y, x in zip(*np.nonzero(env.road_map.roads)):
+            road = self.atlas.roads.get(ROAD_TYPES[env.road_map.connections[y, x]])
+            if road is None:
+                continue
+            rgb, alpha = road
+            alpha = alpha[..., None] / 255.0
+            tile = background[y * tile_size:(y + 1) * tile_size, x * tile_size:(x + 1) * tile_size]
+            tile *= 1.0 - alpha
+            tile += rgb * alpha
+        return np.round(background).astype(np.uint8)
+
+    def _blit(self, sprite, location):
+        (dx, dy), rgb, mask = sprite
+        x = int(location[0]) * self.tile_size + dx
+        y = int(location[1]) * self.tile_size + dy
+        height, width = mask.shape
+        np.copyto(self.canvas[y:y + height, x:x + width], rgb, where=mask[..., None])
+
+    def _draw_destination(self, location):
+        tile_size = self.tile_size
+        x = int(location[0]) * tile_size
+        y = int(location[1]) * tile_size
+        tile = self.canvas[y:y + tile_size, x:x + tile_size]
+        tile[self.atlas.destination] = DESTINATION_COLOR
+
+    def render(self, env):
+        np.copyto(self.canvas, self.background)
+        atlas = self.atlas
+        for slot in np.flatnonzero(env._passenger_valid):
+            name = f"{HAIRS[env._passenger_hairs[slot]]}_{SHIRTS[env._passenger_shirts[slot]]}"
+            side = Actions(int(env._passenger_sides[slot])).name
+            self._blit(atlas.characters[(name, side)], env._passenger_locations[slot])
+        for agent_id in np.flatnonzero(env._agent_has_passenger):
+            self._draw_destination(env._agent_destinations[agent_id])
+        for location, direction in zip(env._agent_locations, env._agent_directions):
+            self._blit(atlas.cars[("taxi", direction)], location)
+        for location, direction, color in zip(env._npc_locations, env._npc_directions, env._npc_colors):
+            self._blit(atlas.cars[(NPC_COLORS[color], direction)], location)
+
+        if self.index is None:
+            np.copyto(self.frame, self.canvas)
+        else:
+            np.take(self.canvas, self.index, axis=0, out=self.rows)
+            np.take(self.rows, self.index, axis=1, out=self.frame)
+        return self.frame
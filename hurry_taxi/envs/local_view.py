@@ -0,0 +1,65 @@
+import numpy as np
+from gymnasium import spaces
+from numpy.lib.stride_tricks import sliding_window_view
+
+CHANNELS = ["road", "npc_east", "npc_north", "npc_west", "npc_south", "passenger", "destination"]
+ROAD = CHANNELS.index("road")
+NPC = CHANNELS.index("npc_east")  # Plus the NPC's direction value
+PASSENGER = CHANNELS.index("passenger")
+DESTINATION = CHANNELS.index("destination")
+
+
+def local_observation_space(agents_number, view_size):
+    return spaces.Box(low=0, high=1, shape=(agents_number, len(CHANNELS), view_size, view_size), dtype=np.uint8)
+
+
+class LocalView:
+    """Egocentric view_size x view_size crops of the map around every taxi.
+
+    Each world keeps a channel-last map tensor padded by the view radius.
+    Roads are drawn once. NPC and passenger marks are cleared and redrawn at
+    their cells on every observation, and crops are read through a strided
+    window view of the map. The cost depends on the number of entities, not on
+    the map size. The destination channel only shows the taxi's own
+    destination. All arrays take a leading world axis.
+    """
+
+    def __init__(self, road_map, view_size, num_worlds=1):
+        if view_size % 2 == 0:
+            raise ValueError("view_size must be odd")
+        self.view_size = view_size
+        self.radius = view_size // 2
+        grid_size = road_map.grid_size
+        size = grid_size + 2 * self.radius
+        self.maps = np.zeros((num_worlds, size, size, len(CHANNELS)), dtype=np.uint8)
+        inner = slice(self.radius, self.radius + grid_size)
+        self.maps[:, inner, inner, ROAD] = road_map.roads != 0
+        self._flat_maps = self.maps.reshape(-1)
+        self._marks = np.zeros(0, dtype=np.intp)
+        # windows[world, y, x] is the crop centred on cell (x, y), shaped (C, K, K)
+        self.windows = sliding_window_view(self.maps, (view_size, view_size), axis=(1, 2))
+        self._worlds = np.arange(num_worlds)[:, None]
+
+    def _index(self, worlds, locations, channels):
+        _, height, width, count = self.maps.shape
+        rows = locations[..., 1].astype(np.intp) + self.radius
+        columns = locations[..., 0].astype(np.intp) + self.radius
+        return ((worlds * height + rows) * width + columns) * count + channels
+
+    def observe(self, out, agent_locations, agent_has_passenger, agent_destinations,
+                npc_locations, npc_directions, passenger_locations, passenger_valid):
+        self._flat_maps[self._marks] = 0
+        worlds, slots = np.nonzero(passenger_valid)
+        self._marks = np.concatenate([
+            self._index(self._worlds, npc_locations, NPC + npc_directions).reshape(-1),
+            self._index(worlds, passenger_locations[worlds, slots], PASSENGER),
+        ])
+        self._flat_maps[self._marks] = 1
+
+        out[...] = self.windows[self._worlds, agent_locations[..., 1], agent_locations[..., 0]]
+
+        offsets = agent_destinations - agent_locations + self.radius
+        visible = (agent_has_passenger != 0) & ((offsets >= 0) & (offsets < self.view_size)).all(axis=-1)
+        worlds, agents = np.nonzero(visible)
+        out[worlds, agents, DESTINATION, offsets[worlds, agents, 1], offsets[worlds, agents, 0]] = 1
+        return out
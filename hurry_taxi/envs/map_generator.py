@@ -0,0 +1,41 @@
+import numpy as np
+
+
+def generate_layout(grid_size, block_size=3, road_density=0.5, seed=0):
+    """Road layout of grid_size x grid_size cells with streets between blocks.
+
+    Streets run along every (block_size + 1)-th row and column. A random
+    spanning tree over their intersections keeps the network connected, and
+    every other street segment is kept with probability road_density.
+    """
+    lines = np.arange(0, grid_size, block_size + 1)
+    if len(lines) < 2:
+        raise ValueError("grid_size must fit at least two streets of the given block_size")
+    rng = np.random.default_rng(seed)
+    count = len(lines)
+
+    # Segments join neighbouring intersections (row, column) of the street grid
+    segments = [((i, j), (i, j + 1)) for i in range(count) for j in range(count - 1)]
+    segments += [((i, j), (i + 1, j)) for i in range(count - 1) for j in range(count)]
+    order = rng.permutation(len(segments))
+    keep = rng.random(len(segments)) < road_density
+
+    parents = list(range(count * count))
+
+    def find(node):
+        while parents[node] != node:
+            parents[node] = parents[parents[node]]
+            node = parents[node]
+        return node
+
+    roads = np.zeros((grid_size, grid_size), dtype=np.uint8)
+    for index in order:
+        (i1, j1), (i2, j2) = segments[index]
+        root_1 = find(i1 * count + j1)
+        root_2 = find(i2 * count + j2)
+        if root_1 != root_2:
+            parents[root_1] = root_2
+        elif not keep[index]:
+            continue
+        roads[lines[i1]:lines[i2] + 1, lines[j1]:lines[j2] + 1] = 1
+    return roads
@@ -0,0 +1,61 @@
+import numpy as np
+
+NO_PASSENGER = np.iinfo(np.int32).max
+
+# Offsets of the four cells next to a cell, as (x, y)
+NEIGHBOURS = np.array([[1, 0], [0, -1], [-1, 0], [0, 1]], dtype=np.int16)
+
+
+class OccupancyGrid:
+    """What occupies each cell of the map, kept up to date as entities move.
+
+    Each cell marks the directions of the NPCs on it. Each cell also holds the
+    id of its earliest waiting passenger, and ids grow with arrival order.
+
+    Grids get one extra row and column at the end. Coordinates one step
+    outside the map (-1 or grid_size) both index that padding, so lookups
+    for off-grid moves need no bounds checks.
+    """
+
+    def __init__(self, grid_size):
+        self.grid_size = grid_size
+        size = grid_size + 1
+        self.npcs = np.zeros((size, size, 4), dtype=bool)
+        self._flat_npcs = self.npcs.reshape(-1)
+        self._npc_cells = np.arange(size * size, dtype=np.intp).reshape(size, size) * 4
+        self._npc_marks = np.zeros(0, dtype=np.intp)
+        self.passengers = np.full((size, size), NO_PASSENGER, dtype=np.int32)
+
+    def clear(self):
+        self.npcs.fill(False)
+        self._npc_marks = np.zeros(0, dtype=np.intp)
+        self.passengers.fill(NO_PASSENGER)
+
+    def _npc_index(self, locations, directions):
+        return self._npc_cells[locations[:, 1], locations[:, 0]] + directions
+
+    def place_npcs(self, locations, directions):
+        # Unmarking every previous position before marking the new ones keeps
+        # the marks right when several NPCs share a cell and direction
+        self._flat_npcs[self._npc_marks] = False
+        self._npc_marks = self._npc_index(locations, directions)
+        self._flat_npcs[self._npc_marks] = True
+
+    def has_npc(self, locations, directions):
+        # Whether an NPC facing the given direction is on each cell
+        return self._flat_npcs[self._npc_index(locations, directions)]
+
+    def add_passenger(self, location, passenger_id):
+        cell = (location[1], location[0])
+        self.passengers[cell] = min(self.passengers[cell], passenger_id)
+
+    def remove_passengers(self, locations, waiting_locations, waiting_ids):
+        # Emptied cells fall back to the earliest passenger still waiting there
+        self.passengers[locations[:, 1], locations[:, 0]] = NO_PASSENGER
+        np.minimum.at(self.passengers, (waiting_locations[:, 1], waiting_locations[:, 0]), waiting_ids)
+
+    def earliest_passenger_near(self, locations):
+        # Id of the earliest passenger on the cells next to each location, or
+        # NO_PASSENGER when there is none
+        cells = locations[:, None, :] + NEIGHBOURS
+        return self.passengers[cells[..., 1], cells[..., 0]].min(axis=1)
@@ -0,0 +1,60 @@
+import time
+
+# Methods timed by TaxiGridEnv(profile=True). step and reset include the
+# time of the phases they call.
+STEP_PHASES = ["step", "_handle_collision", "_handle_passengers", "_move_npcs", "_get_obs", "_get_info", "render"]
+RESET_PHASES = ["reset", "_generate_agents", "_clear_passengers", "_add_passenger", "_generate_npcs"]
+
+
+class TimedMethod:
+    # Kept as a class rather than a closure so deepcopy copies the bound
+    # method along with its env
+    def __init__(self, method, totals):
+        self.method = method
+        self.totals = totals
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return self.method(*args, **kwargs)
+        finally:
+            self.totals[0] += 1
+            self.totals[1] += time.perf_counter_ns() - start
+
+
+class PhaseProfiler:
+    """Call counts and wall time of an object's methods.
+
+    Methods are replaced by timed wrappers on the instance only, so objects
+    created without a profiler run their methods untouched.
+    """
+
+    def __init__(self, owner, names):
+        self.totals = {name: [0, 0] for name in names}
+        for name in names:
+            setattr(owner, name, TimedMethod(getattr(owner, name), self.totals[name]))
+
+    def clear(self):
+        for totals in self.totals.values():
+            totals[0] = totals[1] = 0
+
+    def stats(self):
+        return {
+            name: phase_stats(calls, total_ns * 1e-9)
+            for name, (calls, total_ns) in self.totals.items()
+        }
+
+
+def phase_stats(calls, seconds):
+    return {"calls": calls, "seconds": seconds, "mean_us": seconds / calls * 1e6 if calls else 0.0}
+
+
+def merge_perf_stats(stats_list):
+    # Sums perf_stats() of several envs, such as the list returned by
+    # VecEnv.env_method("perf_stats")
+    merged = {}
+    for stats in stats_list:
+        for name, phase in stats.items():
+            calls, seconds = merged.get(name, (0, 0.0))
+            merged[name] = (calls + phase["calls"], seconds + phase["seconds"])
+    return {name: phase_stats(calls, seconds) for name, (calls, seconds) in merged.items()}
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from hurry_taxi.envs.map_generator import generate_layout
+from hurry_taxi.envs.small_map import small_map
+from hurry_taxi.envs.medium_map import medium_map
+from hurry_taxi.envs.large_map import large_map
+
+# Bit i of a connection mask is set when moving with action value i (right,
+# up, left, down) from a cell lands on a road
+CONNECTION_BITS = {"right": 1, "up": 2, "left": 4, "down": 8}
+# Order in which connections are listed, and sampled from, at spawn time
+CONNECTION_ORDER = ["up", "down", "left", "right"]
+ACTION_VALUES = {"right": 0, "up": 1, "left": 2, "down": 3}
+NOTHING = 4
+
+
+def mask_to_connections(mask):
+    return {direction: int(mask & CONNECTION_BITS[direction] != 0) for direction in CONNECTION_ORDER}
+
+
+def get_road_type(connections):
+    connection_count = sum(connections.values())
+    if connection_count == 2:
+        if connections["left"] and connections["right"]:
+            return "horizontal"
+        elif connections["up"] and connections["down"]:
+            return "vertical"
+        elif connections["up"] and connections["right"]:
+            return "curve_up_right"
+        elif connections["up"] and connections["left"]:
+            return "curve_up_left"
+        elif connections["down"] and connections["right"]:
+            return "curve_down_right"
+        elif connections["down"] and connections["left"]:
+            return "curve_down_left"
+    elif connection_count == 4:
+        return "crossroad"
+    elif connection_count == 3:
+        if not connections["up"]:
+            return "T_down"
+        elif not connections["down"]:
+            return "T_up"
+        elif not connections["left"]:
+            return "T_right"
+        elif not connections["right"]:
+            return "T_left"
+    elif connection_count == 1:
+        if connections["up"]:
+            return "end_down"
+        elif connections["down"]:
+            return "end_up"
+        elif connections["left"]:
+            return "end_right"
+        elif connections["right"]:
+            return "end_left"
+    return "building"
+
+
+# Per-mask lookup tables
+ROAD_TYPES = [get_road_type(mask_to_connections(mask)) for mask in range(16)]
+# Action values an NPC may take: every connected move, then staying still
+NPC_ACTIONS = [
+    np.array([action for action in range(4) if mask >> action & 1] + [NOTHING], dtype=np.int16)
+    for mask in range(16)
+]
+# Action values of the connected sides, in CONNECTION_ORDER. These are also the
+# direction values a car spawned on the cell may face.
+CONNECTED_SIDES = [
+    np.array(
+        [ACTION_VALUES[side] for side in CONNECTION_ORDER if mask & CONNECTION_BITS[side]],
+        dtype=np.int16,
+    )
+    for mask in range(16)
+]
+
+# The same tables padded to fixed width, with their lengths, for batched sampling
+NPC_ACTION_COUNTS = np.array([len(actions) for actions in NPC_ACTIONS], dtype=np.int16)
+NPC_ACTION_TABLE = np.full((16, 5), NOTHING, dtype=np.int16)
+CONNECTED_SIDE_COUNTS = np.array([len(sides) for sides in CONNECTED_SIDES], dtype=np.int16)
+CONNECTED_SIDE_TABLE = np.zeros((16, 4), dtype=np.int16)
+for mask in range(16):
+    NPC_ACTION_TABLE[mask, :len(NPC_ACTIONS[mask])] = NPC_ACTIONS[mask]
+    CONNECTED_SIDE_TABLE[mask, :len(CONNECTED_SIDES[mask])] = CONNECTED_SIDES[mask]
+
+
+# Bump when generate_layout or the compiled arrays change, so stale cached
+# maps are not picked up
+MAP_CACHE_VERSION = 1
+MAP_CACHE_DIR = os.environ.get(
+    "HURRY_TAXI_MAP_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "hurry_taxi", "maps")
+)
+
+
+def get_layout(grid_size):
+    match grid_size:
+        case 5:
+            return small_map
+        case 10:
+            return medium_map
+        case 25:
+            return large_map
+        case _:
+            raise ValueError("Invalid grid size")
+
+
+def save_arrays(path, arrays):
+    # Written to a temporary folder and renamed into place, so concurrent
+    # writers never leave a half-written folder behind
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    folder = tempfile.mkdtemp(dir=parent)
+    for name, array in arrays.items():
+        np.save(os.path.join(folder, f"{name}.npy"), array)
+    try:
+        os.rename(folder, path)
+    except OSError:
+        shutil.rmtree(folder)
+        if not os.path.isdir(path):
+            raise
+
+
+def load_arrays(path, names, mmap_mode="r"):
+    return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in names}
+
+
+def load_road_map(grid_size, map_options=None):
+    # The hand-made maps are used unless generator options are given
+    if map_options is None and grid_size in (5, 10, 25):
+        return RoadMap(get_layout(grid_size))
+    return load_generated_map(grid_size, **(map_options or {}))
+
+
+def load_generated_map(grid_size, block_size=3, road_density=0.5, seed=0, cache_dir=None):
+    # Compiled maps are stored once per set of generator parameters and then
+    # memory-mapped, so every worker process shares the same pages
+    params = dict(
+        version=MAP_CACHE_VERSION, grid_size=grid_size, block_size=block_size, road_density=road_density, seed=seed
+    )
+    key = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+    path = os.path.join(cache_dir or MAP_CACHE_DIR, f"map_{grid_size}_{key}")
+    if not os.path.isdir(path):
+        RoadMap(generate_layout(grid_size, block_size, road_density, seed)).save(path)
+    return RoadMap.load(path)
+
+
+class RoadMap:
+    ARRAYS = [
+        "roads",
+        "padded_roads",
+        "connections",
+        "road_cells",
+        "road_cell_connections",
+        "curb_cells",
+        "curb_cell_connections",
+    ]
+
+    def __init__(self, layout):
+        self.roads = np.array(layout, dtype=np.uint8)
+        self.layout = layout
+        self.grid_size = len(self.roads)
+        # One cell of padding so moves that leave the grid look up a non-road
+        self.padded_roads = np.pad(self.roads, 1)
+        padded = self.padded_roads
+        self.connections = (
+            padded[1:-1, 2:]
+            | padded[:-2, 1:-1] << 1
+            | padded[1:-1, :-2] << 2
+            | padded[2:, 1:-1] << 3
+        ).astype(np.uint8)
+
+        # Spawn cells as (x, y) rows with the connection mask of each cell: cars
+        # start on road cells, passengers and destinations on the curb cells
+        # next to a road
+        road_cells = np.argwhere(self.roads != 0)
+        curb_cells = np.argwhere((self.roads == 0) & (self.connections != 0))
+        self.road_cells = road_cells[:, ::-1].astype(np.int16)
+        self.road_cell_connections = self.connections[road_cells[:, 0], road_cells[:, 1]]
+        self.curb_cells = curb_cells[:, ::-1].astype(np.int16)
+        self.curb_cell_connections = self.connections[curb_cells[:, 0], curb_cells[:, 1]]
+
+    def save(self, path):
+        save_arrays(path, {name: getattr(self, name) for name in self.ARRAYS})
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        road_map = cls.__new__(cls)
+        for name, array in load_arrays(path, cls.ARRAYS, mmap_mode).items():
+            setattr(road_map, name, array)
+        road_map.layout = road_map.roads
+        road_map.grid_size = len(road_map.roads)
+        return road_map
+
+    def road_type(self, x, y):
+        if not self.roads[y, x]:
+            return None
+        return ROAD_TYPES[self.connections[y, x]]
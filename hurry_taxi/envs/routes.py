@@ -0,0 +1,116 @@
+import hashlib
+import os
+
+import numpy as np
+
+from hurry_taxi.envs.road_map import MAP_CACHE_DIR, MAP_CACHE_VERSION, NOTHING, load_arrays, save_arrays
+
+UNREACHABLE = np.iinfo(np.uint16).max
+
+# Moves of the four driving actions, as (x, y)
+ACTION_VECTORS = np.array([[1, 0], [0, -1], [-1, 0], [0, 1]], dtype=np.int16)
+
+
+def road_index_grid(road_map):
+    # Road cell index of each cell. Non-road cells, and the extra row and
+    # column that coordinates -1 and grid_size wrap onto, hold len(road_cells)
+    size = road_map.grid_size + 1
+    road_cells = road_map.road_cells
+    road_index = np.full((size, size), len(road_cells), dtype=np.int32)
+    road_index[road_cells[:, 1], road_cells[:, 0]] = np.arange(len(road_cells))
+    return road_index
+
+
+def adjacent_road_grid(road_map):
+    # Road cell indexes of the four neighbours of each cell, len(road_cells)
+    # where the neighbour is not a road
+    road_index = road_index_grid(road_map)
+    size = road_map.grid_size + 1
+    ys, xs = np.mgrid[:size, :size]
+    return np.stack([road_index[(ys + dy) % size, (xs + dx) % size] for dx, dy in ACTION_VECTORS], axis=-1)
+
+
+def build_routes(road_map):
+    """Shortest road distances and first moves between every pair of road cells.
+
+    Both tables are indexed [from, to] by road cell index, with one extra row
+    and column for cells off the road. Distances are UNREACHABLE, and next
+    actions NOTHING, when there is no route or the cells are the same.
+    """
+    road_cells = road_map.road_cells
+    count = len(road_cells)
+    road_index = road_index_grid(road_map)
+    neighbours = np.stack([
+        road_index[road_cells[:, 1] + dy, road_cells[:, 0] + dx] for dx, dy in ACTION_VECTORS
+    ])
+
+    # Breadth-first search from every cell at once: row a of frontier marks
+    # the cells at the current distance from a. The extra row stays empty
+    # so moves off the road reach nothing.
+    distances = np.full((count + 1, count + 1), UNREACHABLE, dtype=np.uint16)
+    road_distances = distances[:count, :count]
+    np.fill_diagonal(road_distances, 0)
+    frontier = np.zeros((count + 1, count), dtype=bool)
+    np.fill_diagonal(frontier, True)
+    reached = frontier[:count].copy()
+    level = 0
+    while frontier.any():
+        level += 1
+        new = frontier[neighbours[0]]
+        for action_neighbours in neighbours[1:]:
+            new |= frontier[action_neighbours]
+        new &= ~reached
+        reached |= new
+        road_distances[new] = level
+        frontier[:count] = new
+
+    # The first move toward b is any neighbour one step closer to it, taking
+    # the lowest action value on ties
+    next_actions = np.full((count + 1, count + 1), NOTHING, dtype=np.uint8)
+    closer = road_distances.astype(np.int32) - 1
+    for action in reversed(range(len(ACTION_VECTORS))):
+        next_actions[:count, :count][distances[neighbours[action], :count] == closer] = action
+    return distances, next_actions
+
+
+class RouteTable:
+    ARRAYS = ["distances", "next_actions"]
+
+    def __init__(self, road_map, cache_dir=None):
+        # Tables are built once per road layout and memory-mapped afterwards
+        key = hashlib.sha1(np.ascontiguousarray(road_map.roads).tobytes()).hexdigest()[:16]
+        name = f"routes_{road_map.grid_size}_{key}_v{MAP_CACHE_VERSION}"
+        path = os.path.join(cache_dir or MAP_CACHE_DIR, name)
+        if not os.path.isdir(path):
+            save_arrays(path, dict(zip(self.ARRAYS, build_routes(road_map))))
+        arrays = load_arrays(path, self.ARRAYS)
+        self.distances = arrays["distances"]
+        self.next_actions = arrays["next_actions"]
+        self.road_index = road_index_grid(road_map)
+        self.adjacent_roads = adjacent_road_grid(road_map)
+
+    def _indexes(self, location):
+        location = np.asarray(location)
+        return self.road_index[location[..., 1], location[..., 0]]
+
+    def distance(self, a, b):
+        # Road distance between locations given as (x, y), or arrays of them
+        return self.distances[self._indexes(a), self._indexes(b)]
+
+    def next_action(self, a, b):
+        # Action value of the first move on a shortest route from a to b
+        return self.next_actions[self._indexes(a), self._indexes(b)]
+
+    def closest_adjacent_road(self, a, b):
+        # Distance from a to the nearest road cell next to b, which is where a
+        # taxi picks up a passenger waiting on b or drops one off at b, and
+        # the road cell index of that cell
+        starts = self._indexes(a)[..., None]
+        location = np.asarray(b)
+        ends = self.adjacent_roads[location[..., 1], location[..., 0]]
+        distances = self.distances[starts, ends]
+        closest = distances.argmin(axis=-1)[..., None]
+        return (
+            np.take_along_axis(distances, closest, axis=-1)[..., 0],
+            np.take_along_axis(ends, closest, axis=-1)[..., 0],
+        )
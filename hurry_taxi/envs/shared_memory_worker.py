@@ -0,0 +1,109 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from hurry_taxi.envs.taxi_grid import Events, TaxiGridEnv
+from hurry_taxi.monitoring.episode_log import EpisodeLogger
+
+# Process side of hurry_taxi.vector.SharedMemoryVecEnv. It stays free of
+# Stable-Baselines3 imports, which would cost each worker seconds of startup
+# and hundreds of MB for torch.
+
+# Commands workers read from the shared command value once released
+STEP = 0
+CALL = 1
+CLOSE = 2
+
+
+def array_layout(num_envs, observation_space, action_space):
+    # (name, shape, dtype, offset) of every shared array and the total size,
+    # with arrays aligned to 8 bytes
+    specs = [
+        ("observations", (num_envs, *observation_space.shape), observation_space.dtype),
+        ("terminal_observations", (num_envs, *observation_space.shape), observation_space.dtype),
+        ("actions", (num_envs, *action_space.shape), action_space.dtype),
+        ("rewards", (num_envs,), np.float32),
+        ("terminations", (num_envs,), np.bool_),
+        ("truncations", (num_envs,), np.bool_),
+        ("event_counts", (num_envs, len(Events)), np.int32),
+    ]
+    layout = []
+    offset = 0
+    for name, shape, dtype in specs:
+        dtype = np.dtype(dtype)
+        layout.append((name, shape, dtype, offset))
+        offset += -(-int(np.prod(shape)) * dtype.itemsize // 8) * 8
+    return layout, offset
+
+
+def shared_arrays(buffer, layout):
+    return {
+        name: np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+        for name, shape, dtype, offset in layout
+    }
+
+
+def _step_envs(envs, env_indexes, arrays, infos):
+    actions = arrays["actions"]
+    for local_index, (env_index, env) in enumerate(zip(env_indexes, envs)):
+        obs, reward, terminated, truncated, info = env.step(actions[env_index])
+        arrays["event_counts"][env_index] = np.bincount(env.unwrapped._events + 1, minlength=len(Events) + 1)[1:]
+        arrays["rewards"][env_index] = reward
+        arrays["terminations"][env_index] = terminated
+        arrays["truncations"][env_index] = truncated
+        if terminated or truncated:
+            arrays["terminal_observations"][env_index] = obs
+            obs, _ = env.reset()
+        arrays["observations"][env_index] = obs
+        infos[local_index] = info
+
+
+def _call(envs, env_indexes, arrays, infos, name, data):
+    if name == "reset":
+        for local_index, (env_index, env, (seed, options)) in enumerate(zip(env_indexes, envs, data)):
+            obs, infos[local_index] = env.reset(seed=seed, options=options)
+            arrays["observations"][env_index] = obs
+        return list(infos)
+    if name == "get_infos":
+        return list(infos)
+    local_indexes, args = data
+    if name == "get_attr":
+        return [envs[index].get_wrapper_attr(args) for index in local_indexes]
+    if name == "set_attr":
+        for index in local_indexes:
+            envs[index].set_wrapper_attr(args[0], args[1])
+        return [None for _ in local_indexes]
+    if name == "env_method":
+        method_name, method_args, method_kwargs = args
+        return [envs[index].get_wrapper_attr(method_name)(*method_args, **method_kwargs) for index in local_indexes]
+    raise NotImplementedError(f"`{name}` is not implemented in the worker")
+
+
+def run_worker(remote, memory_name, layout, env_indexes, env_kwargs, episode_log, command, start, finished, errors, worker_id):
+    memory = shared_memory.SharedMemory(name=memory_name)
+    arrays = shared_arrays(memory.buf, layout)
+    envs = [TaxiGridEnv(copy_obs=False, **env_kwargs) for _ in env_indexes]
+    if episode_log is not None:
+        envs = [EpisodeLogger(env, episode_log, worker_id=env_index) for env, env_index in zip(envs, env_indexes)]
+    infos = [{} for _ in env_indexes]
+    while True:
+        start.acquire()
+        if command.value == CLOSE:
+            break
+        try:
+            if command.value == STEP:
+                _step_envs(envs, env_indexes, arrays, infos)
+            else:
+                name, data = remote.recv()
+                remote.send(_call(envs, env_indexes, arrays, infos, name, data))
+        except Exception as error:
+            errors[worker_id] = 1
+            remote.send(error)
+        finished.release()
+
+    for env in envs:
+        env.close()
+    # Views into the block must go before it can be closed
+    arrays = None
+    memory.close()
+    remote.close()
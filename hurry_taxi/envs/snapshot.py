@@ -0,0 +1,66 @@
+import struct
+
+# step_count, passenger counter, position in the randomizer block, whether
+# the randomizer holds a block
+HEADER = struct.Struct("<qqq?")
+# PCG64 state and increment as 128-bit integers, has_uint32 and uinteger
+GENERATOR_STATE = struct.Struct("<16s16s?I")
+
+
+def pack_generator_state(state):
+    if state is None:
+        return bytes(GENERATOR_STATE.size)
+    if state["bit_generator"] != "PCG64":
+        raise ValueError("Snapshots need a PCG64 generator")
+    return GENERATOR_STATE.pack(
+        state["state"]["state"].to_bytes(16, "little"),
+        state["state"]["inc"].to_bytes(16, "little"),
+        state["has_uint32"],
+        state["uinteger"],
+    )
+
+
+def unpack_generator_state(data, offset):
+    state, inc, has_uint32, uinteger = GENERATOR_STATE.unpack_from(data, offset)
+    return {
+        "bit_generator": "PCG64",
+        "state": {"state": int.from_bytes(state, "little"), "inc": int.from_bytes(inc, "little")},
+        "has_uint32": int(has_uint32),
+        "uinteger": uinteger,
+    }
+
+
+def byte_views(arrays):
+    # Writable byte views of contiguous arrays, copied to and from snapshots
+    # without going through numpy. Made per call, as memoryviews don't pickle.
+    return [memoryview(array).cast("B") for array in arrays]
+
+
+def pack_state(counters, generator_state, block_state, views):
+    return b"".join([
+        HEADER.pack(*counters),
+        pack_generator_state(generator_state),
+        pack_generator_state(block_state),
+        *views,
+    ])
+
+
+def unpack_state(data, views):
+    """Reads a blob from pack_state, copying array contents in place.
+
+    Returns the header counters and the two generator states, the second
+    being None when the randomizer held no block.
+    """
+    expected = HEADER.size + 2 * GENERATOR_STATE.size + sum(view.nbytes for view in views)
+    if len(data) != expected:
+        raise ValueError(f"State has {len(data)} bytes, expected {expected}")
+    counters = HEADER.unpack_from(data)
+    offset = HEADER.size
+    generator_state = unpack_generator_state(data, offset)
+    offset += GENERATOR_STATE.size
+    block_state = unpack_generator_state(data, offset) if counters[3] else None
+    offset += GENERATOR_STATE.size
+    for view in views:
+        view[:] = data[offset:offset + view.nbytes]
+        offset += view.nbytes
+    return counters[:3], generator_state, block_state
@@ -0,0 +1,75 @@
+import os
+from importlib import resources
+
+import pygame
+
+# Resolved from the installed package, so rendering works from any directory
+ASSETS_FOLDER = str(resources.files("hurry_taxi") / "assets")
+ROADS_FOLDER = os.path.join(ASSETS_FOLDER, "roads")
+CARS_FOLDER = os.path.join(ASSETS_FOLDER, "cars")
+CHARACTERS_FOLDER = os.path.join(ASSETS_FOLDER, "characters")
+
+ROAD_ASSETS = {
+    "horizontal": os.path.join(ROADS_FOLDER, "horizontal_road.png"),
+    "vertical": os.path.join(ROADS_FOLDER, "vertical_road.png"),
+    "curve_up_right": os.path.join(ROADS_FOLDER, "curve03.png"),
+    "curve_up_left": os.path.join(ROADS_FOLDER, "curve04.png"),
+    "curve_down_right": os.path.join(ROADS_FOLDER, "curve01.png"),
+    "curve_down_left": os.path.join(ROADS_FOLDER, "curve02.png"),
+    "crossroad": os.path.join(ROADS_FOLDER, "crossroad.png"),
+    "T_down": os.path.join(ROADS_FOLDER, "t_intersection02.png"),
+    "T_up": os.path.join(ROADS_FOLDER, "t_intersection03.png"),
+    "T_right": os.path.join(ROADS_FOLDER, "t_intersection01.png"),
+    "T_left": os.path.join(ROADS_FOLDER, "t_intersection04.png"),
+    "end_down": os.path.join(ROADS_FOLDER, "end_road01.png"),
+    "end_up": os.path.join(ROADS_FOLDER, "end_road02.png"),
+    "end_right": os.path.join(ROADS_FOLDER, "end_road03.png"),
+    "end_left": os.path.join(ROADS_FOLDER, "end_road04.png"),
+    "grass": os.path.join(ASSETS_FOLDER, "grass.png"),
+}
+
+CAR_ASSETS = {
+    "taxi": os.path.join(CARS_FOLDER, "taxi_small.png"),
+    "black": os.path.join(CARS_FOLDER, "car_black_small.png"),
+    "red": os.path.join(CARS_FOLDER, "car_red_small.png"),
+    "blue": os.path.join(CARS_FOLDER, "car_blue_small.png"),
+    "green": os.path.join(CARS_FOLDER, "car_green_small.png"),
+}
+
+CHARACTER_ASSETS = {
+    f"{hair}_{shirt}": os.path.join(CHARACTERS_FOLDER, f"character_{hair}_{shirt}.png")
+    for hair in ["black", "blonde", "brown"]
+    for shirt in ["blue", "red", "green", "white"]
+}
+
+# Shared by every env in the process: raw images keyed by path and transformed
+# sprites keyed by (path, rotation, size).
+_images = {}
+_sprites = {}
+
+
+def load_image(path):
+    image = _images.get(path)
+    if image is None:
+        image = pygame.image.load(path)
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha()
+        _images[path] = image
+    return image
+
+
+def get_sprite(path, angle, size):
+    key = (path, angle, size)
+    sprite = _sprites.get(key)
+    if sprite is None:
+        sprite = load_image(path)
+        if angle:
+            sprite = pygame.transform.rotate(sprite, angle)
+        sprite = pygame.transform.scale(sprite, size)
+        _sprites[key] = sprite
+    return sprite
+
+
+def clear():
+    _images.clear()
+    _sprites.clear()
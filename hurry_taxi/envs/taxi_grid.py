@@ -1,15 +1,24 @@
 import gymnasium as gym
 import numpy as np
 from gymnasium import spaces
-import pygame
-import os
 from enum import Enum
 
+from hurry_taxi.envs.local_view import LocalView, local_observation_space
+from hurry_taxi.envs.occupancy import NO_PASSENGER, OccupancyGrid
+from hurry_taxi.envs.profiling import RESET_PHASES, STEP_PHASES, PhaseProfiler
+from hurry_taxi.envs.road_map import (
+    CONNECTED_SIDES,
+    NPC_ACTION_COUNTS,
+    NOTHING,
+    NPC_ACTION_TABLE,
+    load_road_map,
+    get_road_type,
+    mask_to_connections,
+)
+from hurry_taxi.envs.routes import RouteTable
+from hurry_taxi.envs.snapshot import byte_views, pack_state, unpack_state
 from hurry_taxi.utils.guaussian import Gaussian2D
 from hurry_taxi.utils.position_randomizer import PositionRandomizer
-from hurry_taxi.envs.small_map import small_map
-from hurry_taxi.envs.medium_map import medium_map
-from hurry_taxi.envs.large_map import large_map
 
 
 class Actions(Enum):
@@ -30,32 +39,117 @@ class Events(Enum):
     leaves_passenger = 1
     collision = 2
 
+NO_EVENT = -1
+SHIRTS = ["white", "red", "blue", "green"]
+HAIRS = ["black", "blonde", "brown"]
+NPC_COLORS = ["black", "red", "blue", "green"]
+
+
+def continuous_to_discrete_actions(continuous_actions):
+    # Map continuous [-1, 1] to discrete actions (0, 1, 2, 3, 4) for every agent at once
+    # In float64, as the per-agent scalar decoding did, so boundaries round the same
+    scaled = (np.asarray(continuous_actions, dtype=np.float64) + 1) * (len(Actions) - 1) / 2
+    return np.clip(scaled, 0, len(Actions) - 1).astype(np.intp)
+
+
+def as_discrete_actions(discrete_actions):
+    return np.asarray(discrete_actions, dtype=np.intp)
+
+
+def action_space_for(action_type, agents_number):
+    # Action space and decoder to action values for each action_type
+    match action_type:
+        case "continuous":
+            space = spaces.Box(low=-1.0, high=1.0, shape=(agents_number,), dtype=np.float32)
+            return space, continuous_to_discrete_actions
+        case "discrete":
+            return spaces.MultiDiscrete([len(Actions)] * agents_number), as_discrete_actions
+        case _:
+            raise ValueError("Invalid action type")
+
+
+def observation_space_for(obs_type, flat_obs_dim, grid_size, agents_number, view_size):
+    match obs_type:
+        case "flat":
+            return spaces.Box(low=0, high=grid_size, shape=(flat_obs_dim,), dtype=np.float32)
+        case "local":
+            return local_observation_space(agents_number, view_size)
+        case _:
+            raise ValueError("Invalid observation type")
+
+
+def observation_blocks(agents_number, number_of_npcs, max_passengers):
+    return [
+        ("agent_locations", 2 * agents_number),
+        ("agent_directions", agents_number),
+        ("agent_passenger_status", agents_number),
+        ("passenger_destinations", 2 * agents_number),
+        ("npc_locations", 2 * number_of_npcs),
+        ("npc_directions", number_of_npcs),
+        ("passenger_status", max_passengers),  # Waiting or not
+        ("passenger_locations", 2 * max_passengers),
+    ]
+
+
+# Extra entries of the passenger blocks, for the slot past the last one
+# observed
+SPARE_ROWS = {"passenger_status": 1, "passenger_locations": 2}
+
+
+def observed_state_layout(obs_blocks, spare_rows, batch_shape=()):
+    # Everything the observation reports lives in one int16 block laid out
+    # in observation order, so building it is a cast-copy of a few contiguous
+    # runs into a preallocated float32 buffer. Blocks listed in spare_rows
+    # hold extra entries that are kept out of the observation. Every array
+    # has batch_shape in front, one row per world of a vectorized env.
+    obs_dim = sum(size for _, size in obs_blocks)
+    observed_state = np.zeros(batch_shape + (obs_dim + sum(spare_rows.values()),), dtype=np.int16)
+    obs = np.zeros(batch_shape + (obs_dim,), dtype=np.float32)
+    blocks = {}
+    runs = []
+    obs_offset = state_offset = 0
+    for name, size in obs_blocks:
+        spare = spare_rows.get(name, 0)
+        blocks[name] = observed_state[..., state_offset:state_offset + size + spare]
+        if runs and runs[-1][1] == obs_offset and runs[-1][3] == state_offset:
+            runs[-1][1] += size
+            runs[-1][3] += size
+        else:
+            runs.append([obs_offset, obs_offset + size, state_offset, state_offset + size])
+        obs_offset += size
+        state_offset += size + spare
+    copies = [
+        (obs[..., obs_start:obs_end], observed_state[..., state_start:state_end])
+        for obs_start, obs_end, state_start, state_end in runs
+    ]
+    return observed_state, obs, blocks, copies
+
+
 class TaxiGridEnv(gym.Env):
     metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 4}
 
-    def __init__(self, render_mode=None, grid_size=25, max_steps=1000, agents_number=2, npc_number=4):
+    def __init__(self, render_mode=None, grid_size=25, max_steps=1000, agents_number=2, npc_number=4, render_resolution=None, copy_obs=True, map_options=None, action_type="continuous", obs_type="flat", view_size=7, profile=False):
         self.grid_size = grid_size
+        self.map_options = map_options
         self.window_size = 1024
+        self.render_resolution = render_resolution or self.window_size
         self.max_steps = max_steps
         self.agents_number = agents_number
         self.max_passengers = 2 * self.agents_number
         self.number_of_npcs = npc_number
-        self.npcs = None
-        self.action_space = spaces.Box(low=-1.0, high=1.0, shape=(self.agents_number,), dtype=np.float32)
+        self.copy_obs = copy_obs
+        self.action_type = action_type
+        self.action_space, self._decode_actions = action_space_for(action_type, self.agents_number)
+        self.obs_type = obs_type
+        self.view_size = view_size
 
         
-        obs_dim = (
-            2 * self.agents_number +  # Agent locations
-            self.agents_number +     # Agent directions
-            self.agents_number +     # Agent passenger status
-            2 * self.agents_number + # Passenger destinations
-            2 * self.number_of_npcs + # NPC locations
-            self.number_of_npcs +     # NPC directions
-            self.max_passengers +     # Passenger status (waiting or not)
-            2 * self.max_passengers   # Passenger locations
-        )
+        self._obs_blocks = observation_blocks(self.agents_number, self.number_of_npcs, self.max_passengers)
+        self._flat_obs_dim = sum(size for _, size in self._obs_blocks)
       
-        self.observation_space = spaces.Box(low=0, high=self.grid_size, shape=(obs_dim,), dtype=np.float32)
+        self.observation_space = observation_space_for(
+            obs_type, self._flat_obs_dim, self.grid_size, self.agents_number, self.view_size
+        )
 
 
         self._action_to_vector = {
@@ -65,75 +159,185 @@ class TaxiGridEnv(gym.Env):
             Actions.down: np.array([0, 1]),
             Actions.nothing: np.array([0, 0]),
         }
+        self._action_vectors = np.array(
+            [self._action_to_vector[action] for action in Actions], dtype=np.int16
+        )
 
-        self._direction_to_angle = {
-            Directions.north: 0,
-            Directions.east: -90,
-            Directions.south: 180,
-            Directions.west: 90,
-        }
+        # Reward per event, indexed by event value + 1 so NO_EVENT maps to slot 0
+        self._event_rewards = np.array(
+            [self._get_reward(None)] + [self._get_reward(event) for event in Events]
+        )
 
         self._load_map()
+        self._init_state()
         self._init_randomizers()
         self._init_visualization(render_mode)
+        # Only profiled envs get timed wrappers, others keep plain methods
+        self._profiler = PhaseProfiler(self, STEP_PHASES + RESET_PHASES) if profile else None
 
     def _load_map(self):
-        match self.grid_size:
-            case 5:
-                self.map = small_map
-            case 10:
-                self.map = medium_map
-            case 25:
-                self.map = large_map
-            case _:
-                raise ValueError("Invalid grid size")
+        self.road_map = load_road_map(self.grid_size, self.map_options)
+        self.map = self.road_map.layout
+        self._connections = self.road_map.connections
+        self._window_renderer = None
+        self._array_renderer = None
+        self._routes = None
+
+    @property
+    def routes(self):
+        # Built, or loaded from the map cache, on first use
+        if self._routes is None:
+            self._routes = RouteTable(self.road_map)
+        return self._routes
+
+    def distance(self, a, b):
+        return self.routes.distance(a, b)
+
+    def next_action(self, a, b):
+        return self.routes.next_action(a, b)
+
+    def _init_state(self):
+        # Waiting passengers are packed at the front of the passenger slots in
+        # arrival order. Empty slots, and destinations of free agents, are zero.
+        passenger_slots = self.max_passengers + 1
+        self._observed_state, self._obs, self._state_blocks, self._obs_copies = observed_state_layout(
+            self._obs_blocks, SPARE_ROWS
+        )
+        self._agent_locations = self._state_blocks["agent_locations"].reshape(self.agents_number, 2)
+        self._agent_directions = self._state_blocks["agent_directions"]
+        self._agent_has_passenger = self._state_blocks["agent_passenger_status"]
+        self._agent_destinations = self._state_blocks["passenger_destinations"].reshape(self.agents_number, 2)
+        self._agent_passenger_ids = np.full(self.agents_number, -1, dtype=np.int32)
+        self._npc_locations = self._state_blocks["npc_locations"].reshape(self.number_of_npcs, 2)
+        self._npc_directions = self._state_blocks["npc_directions"]
+        self._npc_colors = np.zeros(self.number_of_npcs, dtype=np.int8)
+        self._passenger_valid = self._state_blocks["passenger_status"]
+        self._passenger_ids = np.zeros(passenger_slots, dtype=np.int32)
+        self._passenger_locations = self._state_blocks["passenger_locations"].reshape(passenger_slots, 2)
+        self._passenger_destinations = np.zeros((passenger_slots, 2), dtype=np.int16)
+        self._passenger_sides = np.zeros(passenger_slots, dtype=np.int8)
+        self._passenger_shirts = np.zeros(passenger_slots, dtype=np.int8)
+        self._passenger_hairs = np.zeros(passenger_slots, dtype=np.int8)
+        self._passenger_arrays = [
+            self._passenger_ids,
+            self._passenger_locations,
+            self._passenger_destinations,
+            self._passenger_sides,
+            self._passenger_shirts,
+            self._passenger_hairs,
+        ]
+        # Everything get_state saves besides counters and generator states
+        self._state_arrays = [
+            self._observed_state,
+            self._agent_passenger_ids,
+            self._npc_colors,
+            self._passenger_ids,
+            self._passenger_destinations,
+            self._passenger_sides,
+            self._passenger_shirts,
+            self._passenger_hairs,
+        ]
+        self._events = np.full(self.agents_number, NO_EVENT, dtype=np.int8)
+        self._occupancy = OccupancyGrid(self.grid_size)
+        self._local_view = None
+        if self.obs_type == "local":
+            # Crops are written straight into their own observation buffer
+            self._local_view = LocalView(self.road_map, self.view_size)
+            self._obs = np.zeros(self.observation_space.shape, dtype=np.uint8)
 
     
     def _init_randomizers(self):
-        self.randomizer = PositionRandomizer(self.grid_size)
+        # Both share self.np_random, so reset(seed=...) fixes every draw
+        self.randomizer = PositionRandomizer(self.grid_size, self.np_random)
         mean = self.grid_size / 2
-        self.gaussian = Gaussian2D([mean, mean], [[1, 0], [0, 1]])
+        self.gaussian = Gaussian2D([mean, mean], [[1, 0], [0, 1]], self.np_random)
 
     def _init_visualization(self, render_mode):
         self.render_mode = render_mode
         self.screen_width = 600
         self.screen_height = 600
-        self.window = None
-        self.screen = None
-        self.clock = None
         self.isopen = True
 
+    @property
+    def _agents(self):
+        return [
+            {
+                "id": agent_id,
+                "location": self._agent_locations[agent_id].astype(int),
+                "direction": Directions(int(self._agent_directions[agent_id])),
+                "passenger": {
+                    "id": int(self._agent_passenger_ids[agent_id]),
+                    "destination": self._agent_destinations[agent_id].astype(int),
+                } if self._agent_has_passenger[agent_id] else None,
+                "has_passenger": int(self._agent_has_passenger[agent_id]),
+            }
+            for agent_id in range(self.agents_number)
+        ]
+
+    @property
+    def npcs(self):
+        return [
+            {
+                "location": self._npc_locations[npc_id].astype(int),
+                "direction": Directions(int(self._npc_directions[npc_id])),
+                "color": NPC_COLORS[self._npc_colors[npc_id]],
+            }
+            for npc_id in range(self.number_of_npcs)
+        ]
+
+    @property
+    def _waiting_passengers(self):
+        return [
+            {
+                "id": int(self._passenger_ids[slot]),
+                "location": self._passenger_locations[slot].astype(int),
+                "destination": self._passenger_destinations[slot].astype(int),
+                "shirt": SHIRTS[self._passenger_shirts[slot]],
+                "hair": HAIRS[self._passenger_hairs[slot]],
+                "direction": Actions(int(self._passenger_sides[slot])).name,
+            }
+            for slot in np.flatnonzero(self._passenger_valid)
+        ]
+
     def _get_obs(self):
-        # Flatten all observations into a single array
-        obs = np.concatenate([
-            np.array([agent["location"] for agent in self._agents]).flatten(),
-            np.array([agent["direction"].value for agent in self._agents]),
-            np.array([agent["has_passenger"] for agent in self._agents]),
-            np.array([agent["passenger"]["destination"] if agent["has_passenger"] else [0, 0] for agent in self._agents]).flatten(),
-            np.array([npc["location"] for npc in self.npcs]).flatten(),
-            np.array([npc["direction"].value for npc in self.npcs]),
-            np.array([1 if idx < len(self._waiting_passengers) else 0 for idx in range(self.max_passengers)]),
-            np.array([self._waiting_passengers[idx]["location"] if idx < len(self._waiting_passengers) else [0, 0]
-                  for idx in range(self.max_passengers)]).flatten()
-        ], dtype=np.float32)
-        return obs
+        if self._local_view is None:
+            for obs_run, state_run in self._obs_copies:
+                np.copyto(obs_run, state_run)
+        else:
+            self._local_view.observe(
+                self._obs[None],
+                self._agent_locations[None],
+                self._agent_has_passenger[None],
+                self._agent_destinations[None],
+                self._npc_locations[None],
+                self._npc_directions[None],
+                self._passenger_locations[None],
+                self._passenger_valid[None],
+            )
+        if self.copy_obs:
+            return self._obs.copy()
+        return self._obs
 
 
     
     def _get_info(self):
         return {
-            "waiting_passengers": len(self._waiting_passengers),
+            "waiting_passengers": int(np.count_nonzero(self._passenger_valid)),
         }
 
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
+        if seed is not None:
+            self._init_randomizers()
 
         self.step_count = 0
         self._passenger_id = 0
+        self._occupancy.clear()
 
         self._generate_agents()
         
-        self._waiting_passengers = [self._generate_passenger()]
+        self._clear_passengers()
+        self._add_passenger()
 
         self._generate_npcs()
 
@@ -141,100 +345,113 @@ class TaxiGridEnv(gym.Env):
             self.render()
 
         return self._get_obs(), {}
+
+    def perf_stats(self, clear=False):
+        # Calls, total seconds and mean microseconds per phase, empty unless
+        # the env was made with profile=True
+        if self._profiler is None:
+            return {}
+        stats = self._profiler.stats()
+        if clear:
+            self._profiler.clear()
+        return stats
+
+    def get_state(self):
+        # Compact bytes snapshot of the simulation, generator included. The
+        # passenger spawn timer follows from step_count.
+        block_state, block_position = self.randomizer.get_state()
+        counters = (self.step_count, self._passenger_id, block_position, block_state is not None)
+        return pack_state(counters, self.np_random.bit_generator.state, block_state, byte_views(self._state_arrays))
+
+    def set_state(self, state):
+        # Restores a get_state snapshot taken from an env with the same settings
+        counters, generator_state, block_state = unpack_state(state, byte_views(self._state_arrays))
+        self.step_count, self._passenger_id, block_position = counters
+        self.randomizer.set_state(block_state, block_position)
+        self.np_random.bit_generator.state = generator_state
+
+        self._occupancy.clear()
+        self._occupancy.place_npcs(self._npc_locations, self._npc_directions)
+        for slot in np.flatnonzero(self._passenger_valid):
+            self._occupancy.add_passenger(self._passenger_locations[slot], self._passenger_ids[slot])
+        self._events.fill(NO_EVENT)
     
     def _generate_agents(self):
-        self._agents = []
+        self._agent_has_passenger.fill(0)
+        self._agent_destinations.fill(0)
+        self._agent_passenger_ids.fill(-1)
         for agent_id in range(self.agents_number):
-            agent_location = self._get_location_on_road()
-            agent_direction = self._get_valid_direction(agent_location)
-            self._agents.append({
-                "id": agent_id,
-                "location": agent_location,
-                "direction": agent_direction,
-                "passenger": None,
-                "has_passenger": 0
-            })
-    
-    def _get_location_on_road(self):
-        while True:
-            location = np.array(self.randomizer.discrete_randomize(), dtype=int)
-            if not self._is_out_of_road(location):
-                return location
-            
-    def _get_valid_direction(self, location):
-        connections = self.get_connections(location[0], location[1])
-        available_directions = []
-        for direction, connected in connections.items():
-            if connected:
-                direction = self._get_direction_from_action(Actions[direction])
-                available_directions.append(direction)
-        return np.random.choice(available_directions)
-    
-    def _get_valid_target_location(self):
-        while True:
-            location = np.array(self.randomizer.discrete_randomize(), dtype=int)
-            if self._is_beside_road(location) and not self._is_equal_to_any_agent(location):
-                return location
-            
-    def _is_beside_road(self, location):
-        connections = self.get_connections(location[0], location[1])
-        return any(connections.values()) and self._is_out_of_road(location)
-    
-    def _is_equal_to_any_agent(self, location):
-        for agent in self._agents:
-            if np.array_equal(agent["location"], location):
-                return True
-        return False
+            cell = self._get_road_cell()
+            self._agent_locations[agent_id] = self.road_map.road_cells[cell]
+            self._agent_directions[agent_id] = self._get_valid_direction(self.road_map.road_cell_connections[cell])
+
+    def _get_road_cell(self):
+        return self.randomizer.choice(len(self.road_map.road_cells))
+
+    def _get_curb_cell(self):
+        # Agents only ever stand on roads, so no curb cell is occupied by one
+        return self.randomizer.choice(len(self.road_map.curb_cells))
+
+    def _get_valid_direction(self, mask):
+        available_directions = CONNECTED_SIDES[mask]
+        return available_directions[self.randomizer.choice(len(available_directions))]
+
+    def _clear_passengers(self):
+        self._passenger_valid.fill(0)
+        for passenger_array in self._passenger_arrays:
+            passenger_array.fill(0)
+
+    def _add_passenger(self):
+        self._generate_passenger(np.count_nonzero(self._passenger_valid))
     
-    def _generate_passenger(self):
+    def _generate_passenger(self, slot):
         passenger_id = self._passenger_id
         self._passenger_id += 1
-        location = self._get_valid_target_location()
-        connections = [direction for direction, connected in self.get_connections(*location).items() if connected]
-        direction = np.random.choice(connections)
-        return {
-            "id": passenger_id,
-            "location": location,
-            "destination": self._get_valid_target_location(),
-            "shirt": np.random.choice(["white", "red", "blue", "green"]),
-            "hair": np.random.choice(["black", "blonde", "brown"]),
-            "direction": direction
-        }
+        cell = self._get_curb_cell()
+        side = self._get_valid_direction(self.road_map.curb_cell_connections[cell])
+        self._passenger_ids[slot] = passenger_id
+        self._passenger_locations[slot] = self.road_map.curb_cells[cell]
+        self._passenger_destinations[slot] = self.road_map.curb_cells[self._get_curb_cell()]
+        self._passenger_shirts[slot] = self.randomizer.choice(len(SHIRTS))
+        self._passenger_hairs[slot] = self.randomizer.choice(len(HAIRS))
+        self._passenger_sides[slot] = side
+        self._passenger_valid[slot] = 1
+        self._occupancy.add_passenger(self._passenger_locations[slot], passenger_id)
+
+    def _remove_passengers(self, slots):
+        keep = self._passenger_valid != 0
+        keep[slots] = False
+        waiting = np.count_nonzero(keep)
+        removed_locations = self._passenger_locations[slots]
+        for passenger_array in self._passenger_arrays:
+            passenger_array[:waiting] = passenger_array[keep]
+            passenger_array[waiting:] = 0
+        self._passenger_valid[:waiting] = 1
+        self._passenger_valid[waiting:] = 0
+        self._occupancy.remove_passengers(
+            removed_locations, self._passenger_locations[:waiting], self._passenger_ids[:waiting]
+        )
     
     def _generate_npcs(self):
-        self.npcs = []
-        for _ in range(self.number_of_npcs):
-            npc_location = np.array(self.randomizer.discrete_randomize(), dtype=int)
-            while self._is_out_of_road(npc_location):
-                npc_location = np.array(self.randomizer.discrete_randomize(), dtype=int)
-            npc_color = np.random.choice(["black", "red", "blue", "green"])
-
-            self.npcs.append({
-                "location": npc_location,
-                "direction": self._get_valid_direction(npc_location),
-                "color": npc_color
-            })
+        for npc_id in range(self.number_of_npcs):
+            cell = self._get_road_cell()
+            npc_color = self.randomizer.choice(len(NPC_COLORS))
+
+            self._npc_locations[npc_id] = self.road_map.road_cells[cell]
+            self._npc_directions[npc_id] = self._get_valid_direction(self.road_map.road_cell_connections[cell])
+            self._npc_colors[npc_id] = npc_color
+        self._occupancy.place_npcs(self._npc_locations, self._npc_directions)
     
     def continuous_to_discrete_action(self, continuous_action):
-        discrete_actions = []
-        for action in continuous_action:
-            # Map continuous [-1, 1] to discrete action space (0, 1, 2, 3, 4)
-            discrete_action = int(np.clip((action + 1) * (len(Actions) - 1) / 2, 0, len(Actions) - 1))
-            discrete_actions.append(discrete_action)
-        return discrete_actions
+        return continuous_to_discrete_actions(continuous_action)
 
     def step(self, action):
-        discrete_actions = self.continuous_to_discrete_action(action)
-        self._events = [None] * self.agents_number
-        for i in range(self.agents_number):
-            agent_action = discrete_actions[i]
-            agent_action = Actions(agent_action)
-            action_vector = self._action_to_vector[agent_action]
-            new_location = self._agents[i]["location"] + action_vector
-            self._handle_collision(i, new_location)
-            new_direction = self._get_direction_from_action(agent_action)
-            if new_direction:
-                self._agents[i]["direction"] = new_direction
+        discrete_actions = self._decode_actions(action)
+        self._events.fill(NO_EVENT)
+        new_locations = self._agent_locations + self._action_vectors[discrete_actions]
+        self._handle_collision(new_locations)
+        turning = discrete_actions != NOTHING
+        self._agent_directions[turning] = discrete_actions[turning]
         self._handle_passengers()
 
         self._move_npcs()
@@ -245,79 +462,34 @@ class TaxiGridEnv(gym.Env):
         if self.render_mode == "human":
             self.render()
 
-        return self._get_obs(), sum(self._get_reward(event) for event in self._events) / self.agents_number, terminated, False, self._get_info()
+        reward = self._event_rewards[self._events + 1].sum() / self.agents_number
+        return self._get_obs(), float(reward), terminated, False, self._get_info()
     
     def _move_npcs(self):
-        for npc in self.npcs:
-            npc_location = npc["location"]
-            npc_direction = npc["direction"]
-            npc_action = self._get_npc_action(npc_location, npc_direction)
-            npc_action_vector = self._action_to_vector[npc_action]
-            npc["location"] = npc_location + npc_action_vector
-            new_direction = self._get_direction_from_action(npc_action)
-            if new_direction:
-                npc["direction"] = new_direction
-
-    def _get_npc_action(self, location, direction):
-        connections = self.get_connections(location[0], location[1])
-        possible_actions = self._filter_actions_by_connections(connections)
-        possible_actions = self._prevent_u_turn(possible_actions, direction)
-        return np.random.choice(possible_actions)
-
-    def _filter_actions_by_connections(self, connections):
-        possible_actions = []
-        for action in Actions:
-            if action == Actions.nothing or connections[action.name] == 1:
-                possible_actions.append(action)
-        return possible_actions
-    
-    def _prevent_u_turn(self, actions, car_direction):
-        opposite_direction = {
-            Directions.east: Directions.west,
-            Directions.west: Directions.east,
-            Directions.north: Directions.south,
-            Directions.south: Directions.north
-        }
-        if opposite_direction[car_direction] in actions:
-            actions.remove(opposite_direction[car_direction])
-        return actions
+        masks = self._connections[self._npc_locations[:, 1], self._npc_locations[:, 0]]
+        npc_actions = self._get_npc_actions(masks)
+        self._npc_locations += self._action_vectors[npc_actions]
+        turning = npc_actions != NOTHING
+        self._npc_directions[turning] = npc_actions[turning]
+        self._occupancy.place_npcs(self._npc_locations, self._npc_directions)
+
+    def _get_npc_actions(self, masks):
+        # One uniform draw per NPC, scaled to the number of actions it can take
+        choices = self.np_random.random(len(masks)) * NPC_ACTION_COUNTS[masks]
+        return NPC_ACTION_TABLE[masks, choices.astype(np.intp)]
+
+    def _handle_collision(self, new_locations):
+        collisions = self._agents_collide(new_locations)
+        self._events[collisions] = Events.collision.value
+        np.copyto(self._agent_locations, new_locations, where=~collisions[:, None])
+
+    def _agents_collide(self, locations):
+        # Moves are at most one cell, so the padded map also covers off limits
+        off_road = self.road_map.padded_roads[locations[:, 1] + 1, locations[:, 0] + 1] == 0
+        return off_road | self._hits_other_car(locations)
     
-    def _get_direction_from_action(self, action):
-        match action:
-            case Actions.right:
-                return Directions.east
-            case Actions.up:
-                return Directions.north
-            case Actions.left:
-                return Directions.west
-            case Actions.down:
-                return Directions.south
-            case Actions.nothing:
-                return None
-            case _:
-                raise ValueError("Invalid action")
-    
-    def _handle_collision(self, agent_id, new_location):
-        if self._agent_collides(agent_id, new_location):
-            self._events[agent_id] = Events.collision
-        else:
-            self._agents[agent_id]["location"] = new_location
-
-    def _agent_collides(self, agent_id, location):
-        return self._is_off_limits(location) or self._is_out_of_road(location) or self._hits_other_car(agent_id, location)
-    
-    def _hits_other_car(self, agent_id, location):
-        for npc in self.npcs:
-            if np.array_equal(npc["location"], location) and npc["direction"] == self._agents[agent_id]["direction"]:
-                return True
-        return False
-    
-    def _is_out_of_road(self, location):
-        return self.map[location[1]][location[0]] == 0
-
-    def _is_off_limits(self, location):
-        return location[0] < 0 or location[0] >= self.grid_size \
-            or location[1] < 0 or location[1] >= self.grid_size
+    def _hits_other_car(self, locations):
+        return self._occupancy.has_npc(locations, self._agent_directions)
     
     def _handle_passengers(self):
         self._handle_pick_passengers()
@@ -325,33 +497,38 @@ class TaxiGridEnv(gym.Env):
         self._handle_new_waiting_passengers()
 
     def _handle_new_waiting_passengers(self):
-        if self.step_count % 30 == 0 and len(self._waiting_passengers) <= 2 * self.agents_number:
-            self._waiting_passengers.append(self._generate_passenger())
+        if self.step_count % 30 == 0 and np.count_nonzero(self._passenger_valid) <= 2 * self.agents_number:
+            self._add_passenger()
 
     def _handle_drop_passenger(self):
-        for agent in self._agents:
-            if agent["has_passenger"] and self._is_near(agent["location"], agent["passenger"]["destination"]):
-                agent["has_passenger"] = 0
-                agent["passenger"] = None
-                self._events[agent["id"]] = Events.leaves_passenger
+        arrived = (self._agent_has_passenger == 1) & self._is_near(self._agent_locations, self._agent_destinations)
+        self._agent_has_passenger[arrived] = 0
+        self._agent_destinations[arrived] = 0
+        self._agent_passenger_ids[arrived] = -1
+        self._events[arrived] = Events.leaves_passenger.value
 
     def _handle_pick_passengers(self):
-        picked_passengers = []
-        for passenger in self._waiting_passengers:
-            for agent in self._agents:
-                if self._is_near(agent["location"], passenger["location"]) and not agent["has_passenger"]:
-                    agent["has_passenger"] = 1
-                    agent["passenger"] = passenger
-                    self._events[agent["id"]] = Events.takes_passenger
-                    picked_passengers.append(passenger)
-
-        self._waiting_passengers = [passenger for passenger in self._waiting_passengers if passenger not in picked_passengers]
+        # Every free agent takes the earliest waiting passenger next to it, so
+        # two agents beside the same passenger both take it
+        earliest = self._occupancy.earliest_passenger_near(self._agent_locations)
+        picking = np.flatnonzero((earliest != NO_PASSENGER) & (self._agent_has_passenger == 0))
+        if len(picking) == 0:
+            return
+        # Waiting passengers are stored in arrival order, so ids are sorted
+        waiting = np.count_nonzero(self._passenger_valid)
+        slots = np.searchsorted(self._passenger_ids[:waiting], earliest[picking])
+        self._agent_has_passenger[picking] = 1
+        self._agent_destinations[picking] = self._passenger_destinations[slots]
+        self._agent_passenger_ids[picking] = self._passenger_ids[slots]
+        self._events[picking] = Events.takes_passenger.value
+        self._remove_passengers(slots)
 
     def _is_near(self, location_1, location_2):
-        return np.linalg.norm(location_1 - location_2, ord=1) == 1
+        return np.abs(location_1 - location_2).sum(axis=-1) == 1
 
 
-    def _get_reward(self, event):
+    @staticmethod
+    def _get_reward(event):
         match(event):
             case Events.takes_passenger:
                 return 1
@@ -363,262 +540,37 @@ class TaxiGridEnv(gym.Env):
                 return 0
 
     def render(self):
-        if self.window is None and self.render_mode == "human":
-            pygame.init()
-            pygame.display.init()
-            self.window = pygame.display.set_mode((self.window_size, self.window_size))
-        if self.clock is None and self.render_mode == "human":
-            self.clock = pygame.time.Clock()
-        
-        self._load_assets()
-
-        self.canvas = pygame.Surface((self.window_size, self.window_size))
-        self.canvas.fill((255, 255, 255))
-        self.pix_square_size = (
-            self.window_size / self.grid_size
-        )
-
-        self._render_background()
-        self._render_roads()
-        self._render_passengers()
-        self._render_destinations()
-        self._render_agents()
-        self._render_npcs()
+        if self.render_mode != "human":
+            return self._render_array()
 
+        if self._window_renderer is None:
+            # pygame is only imported once a window is needed
+            from hurry_taxi.envs.window_renderer import WindowRenderer
 
-        if self.render_mode == "human":
-            self.window.blit(self.canvas, self.canvas.get_rect())
-            pygame.event.pump()
-            pygame.display.update()
-
-            self.clock.tick(self.metadata["render_fps"])
-        else:
-            return np.transpose(
-                np.array(pygame.surfarray.pixels3d(self.canvas)), axes=(1, 0, 2)
-            )
-
-    def _render_agents(self):
-        for agent in self._agents:
-            agent_position = (
-                int(agent["location"][0] * self.pix_square_size),
-                int(agent["location"][1] * self.pix_square_size),
-            )
-            self._render_car(self.car_sprites["taxi"], agent_position, agent["direction"])
-        
-    def _render_passengers(self):
-        for passenger in self._waiting_passengers:
-            self._render_passenger(passenger)
-
-    def _render_passenger(self, passenger):
-        tile_position = (
-            int(passenger["location"][0] * self.pix_square_size),
-            int(passenger["location"][1] * self.pix_square_size),
-        )
-
-        passenger_position = self._get_passenger_position(tile_position, passenger["direction"])
-        person_sprite = pygame.transform.rotate(self.character_sprites[f"{passenger['hair']}_{passenger['shirt']}"], self._get_passenger_angle(passenger["direction"]))
-        person_sprite = pygame.transform.scale(person_sprite, (int(self.pix_square_size) / 2, int(self.pix_square_size) / 2))
-        self.canvas.blit(person_sprite, passenger_position)
-
-    def _render_destinations(self):
-        for agent in self._agents:
-            if agent["has_passenger"]:
-                passenger = agent["passenger"]
-                tile_position = (
-                    int(passenger["destination"][0] * self.pix_square_size),
-                    int(passenger["destination"][1] * self.pix_square_size),
-                )
-                pygame.draw.rect(
-                    self.canvas, 
-                    (255, 0, 0),
-                    (tile_position[0], tile_position[1], int(self.pix_square_size), int(self.pix_square_size)),
-                    width=2
-                )
-        
+            self._window_renderer = WindowRenderer(self)
+        self._window_renderer.render(self)
 
-    def _get_passenger_position(self, tile_position, direction):
-        x, y = tile_position
-        delta_to_middle = int(self.pix_square_size / 4)
-        delta_to_side = int(self.pix_square_size / 2)
-        match direction:
-            case "right":
-                return (x + delta_to_side, y + delta_to_middle)
-            case "up":
-                return (x + delta_to_middle, y)
-            case "left":
-                return (x, y + delta_to_middle)
-            case "down":
-                return (x + delta_to_middle, y + delta_to_side)
-            case _:
-                return tile_position
-            
-    def _get_passenger_angle(self, direction):
-        match direction:
-            case "right":
-                return 90
-            case "up":
-                return 180
-            case "left":
-                return -90
-            case "down":
-                return 0
-            case _:
-                raise ValueError("Invalid direction")
+    def _render_array(self):
+        if self._array_renderer is None:
+            from hurry_taxi.envs.array_renderer import ArrayRenderer
 
-    def _render_npcs(self):
-        for npc in self.npcs:
-            npc_position = (
-                int(npc["location"][0] * self.pix_square_size),
-                int(npc["location"][1] * self.pix_square_size),
-            )
-            self._render_car(self.car_sprites[npc["color"]], npc_position, npc["direction"])
-
-    def _render_roads(self):
-        for x in range(self.grid_size):
-            for y in range(self.grid_size):
-                position = (int(x * self.pix_square_size), int(y * self.pix_square_size))
-                if self.map[y][x] == 1:
-                    connections = self.get_connections(x, y)
-                    sprite = self.get_sprite(connections)
-                    sprite = pygame.transform.scale(sprite, (int(self.pix_square_size), int(self.pix_square_size)))
-                    if sprite:
-                        self.canvas.blit(sprite, position)
-
-    def _render_background(self):
-        background_sprite = pygame.transform.scale(self.road_sprite['grass'], (int(self.pix_square_size), int(self.pix_square_size)))
-        sprite_width, sprite_height = background_sprite.get_size()
-        canvas_width, canvas_height = self.canvas.get_size()
-
-        for x in range(0, canvas_width, sprite_width):
-            for y in range(0, canvas_height, sprite_height):
-                self.canvas.blit(background_sprite, (x, y))
-        
-    def _load_assets(self):
-        assets_folder = os.path.join("hurry_taxi", "assets")
-        road_folder = os.path.join(assets_folder, "roads")
-        cars_folder = os.path.join(assets_folder, "cars")
-        characters_folder = os.path.join(assets_folder, "characters")
-        self.road_sprite = {
-            'horizontal': pygame.image.load(os.path.join(road_folder, 'horizontal_road.png')).convert_alpha(),
-            'vertical': pygame.image.load(os.path.join(road_folder, 'vertical_road.png')).convert_alpha(),
-            'curve_up_right': pygame.image.load(os.path.join(road_folder, 'curve03.png')).convert_alpha(),
-            'curve_up_left': pygame.image.load(os.path.join(road_folder, 'curve04.png')).convert_alpha(),
-            'curve_down_right': pygame.image.load(os.path.join(road_folder, 'curve01.png')).convert_alpha(),
-            'curve_down_left': pygame.image.load(os.path.join(road_folder, 'curve02.png')).convert_alpha(),
-            'crossroad': pygame.image.load(os.path.join(road_folder, 'crossroad.png')).convert_alpha(),
-            'T_down': pygame.image.load(os.path.join(road_folder, 't_intersection02.png')).convert_alpha(),
-            'T_up': pygame.image.load(os.path.join(road_folder, 't_intersection03.png')).convert_alpha(),
-            'T_right': pygame.image.load(os.path.join(road_folder, 't_intersection01.png')).convert_alpha(),
-            'T_left': pygame.image.load(os.path.join(road_folder, 't_intersection04.png')).convert_alpha(),
-            'end_down': pygame.image.load(os.path.join(road_folder, 'end_road01.png')).convert_alpha(),
-            'end_up': pygame.image.load(os.path.join(road_folder, 'end_road02.png')).convert_alpha(),
-            'end_right': pygame.image.load(os.path.join(road_folder, 'end_road03.png')).convert_alpha(),
-            'end_left': pygame.image.load(os.path.join(road_folder, 'end_road04.png')).convert_alpha(),
-            'grass': pygame.image.load(os.path.join(assets_folder, 'grass.png')).convert_alpha(),
-        }
-        self.car_sprites = {
-            'taxi': pygame.image.load(os.path.join(cars_folder, 'taxi_small.png')).convert_alpha(),
-            'black': pygame.image.load(os.path.join(cars_folder, 'car_black_small.png')).convert_alpha(),
-            'red': pygame.image.load(os.path.join(cars_folder, 'car_red_small.png')).convert_alpha(),
-            'blue': pygame.image.load(os.path.join(cars_folder, 'car_blue_small.png')).convert_alpha(),
-            'green': pygame.image.load(os.path.join(cars_folder, 'car_green_small.png')).convert_alpha(),
-        }
-        self.character_sprites = {
-            "black_blue": pygame.image.load(os.path.join(characters_folder, "character_black_blue.png")).convert_alpha(),
-            "black_red": pygame.image.load(os.path.join(characters_folder, "character_black_red.png")).convert_alpha(),
-            "black_green": pygame.image.load(os.path.join(characters_folder, "character_black_green.png")).convert_alpha(),
-            "black_white": pygame.image.load(os.path.join(characters_folder, "character_black_white.png")).convert_alpha(),
-            "blonde_blue": pygame.image.load(os.path.join(characters_folder, "character_blonde_blue.png")).convert_alpha(),
-            "blonde_red": pygame.image.load(os.path.join(characters_folder, "character_blonde_red.png")).convert_alpha(),
-            "blonde_green": pygame.image.load(os.path.join(characters_folder, "character_blonde_green.png")).convert_alpha(),
-            "blonde_white": pygame.image.load(os.path.join(characters_folder, "character_blonde_white.png")).convert_alpha(),
-            "brown_blue": pygame.image.load(os.path.join(characters_folder, "character_brown_blue.png")).convert_alpha(),
-            "brown_red": pygame.image.load(os.path.join(characters_folder, "character_brown_red.png")).convert_alpha(),
-            "brown_green": pygame.image.load(os.path.join(characters_folder, "character_brown_green.png")).convert_alpha(),
-            "brown_white": pygame.image.load(os.path.join(characters_folder, "character_brown_white.png")).convert_alpha(),
-        }
+            self._array_renderer = ArrayRenderer(self, self.render_resolution)
+        frame = self._array_renderer.render(self)
+        return frame.copy()
 
-    def _render_car(self, original_sprite, tile_position, direction):
-        dimensions = self._get_car_dimensions(direction)
-        position = self._get_car_position(tile_position, direction)
-        sprite = pygame.transform.rotate(original_sprite, self._direction_to_angle[direction])
-        sprite = pygame.transform.scale(sprite, dimensions)
-        self.canvas.blit(sprite, position)
-    
-    def _get_car_dimensions(self, direction):
-        if direction == Directions.east or direction == Directions.west:
-            return (int(self.pix_square_size), int(self.pix_square_size) / 2)
-        return (int(self.pix_square_size) / 2, int(self.pix_square_size))
-    
-    def _get_car_position(self, location, direction):
-        x, y = location
-        match direction:
-            case Directions.east:
-                return (x, y + int(self.pix_square_size / 2))
-            case Directions.north:
-                return (x + int(self.pix_square_size / 2), y)
-            case _:
-                return location
-    
     def close(self):
-        if self.screen is not None:
-            pygame.display.quit()
-            pygame.quit()
-            self.screen = None
-            self.clock = None
+        if self._window_renderer is not None:
+            self._window_renderer.close()
+            self._window_renderer = None
             self.isopen = False
 
     
     def get_sprite(self, connections):
-        road_type = self.get_road_type(connections)
-        return self.road_sprite.get(road_type)
+        # Only available once the window has been drawn
+        return self._window_renderer.get_sprite(self.get_road_type(connections))
     
     def get_road_type(self, connections):
-        connection_count = sum(connections.values())
-        if connection_count == 2:
-            if connections["left"] and connections["right"]:
-                return "horizontal"
-            elif connections["up"] and connections["down"]:
-                return "vertical"
-            elif connections["up"] and connections["right"]:
-                return "curve_up_right"
-            elif connections["up"] and connections["left"]:
-                return "curve_up_left"
-            elif connections["down"] and connections["right"]:
-                return "curve_down_right"
-            elif connections["down"] and connections["left"]:
-                return "curve_down_left"
-        elif connection_count == 4:
-            return "crossroad" 
-        elif connection_count == 3:
-            if not connections["up"]:
-                return "T_down"
-            elif not connections["down"]:
-                return "T_up"
-            elif not connections["left"]:
-                return "T_right"
-            elif not connections["right"]:
-                return "T_left"
-        elif connection_count == 1:
-            if connections["up"]:
-                return "end_down"
-            elif connections["down"]:
-                return "end_up"
-            elif connections["left"]:
-                return "end_right"
-            elif connections["right"]:
-                return "end_left"
-        return "building"
+        return get_road_type(connections)
 
     def get_connections(self, x, y):
-        neighbors = {
-            "up": (x, y - 1),
-            "down": (x, y + 1),
-            "left": (x - 1, y),
-            "right": (x + 1, y)
-        }
-        connections = {
-            direction: self.map[ny][nx] if 0 <= nx < self.grid_size and 0 <= ny < self.grid_size else 0
-            for direction, (nx, ny) in neighbors.items()
-        }
-        return connections
+        return mask_to_connections(self._connections[y, x])
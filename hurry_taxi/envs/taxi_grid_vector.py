@@ -0,0 +1,293 @@
+import numpy as np
+from gymnasium.utils import seeding
+from gymnasium.vector import VectorEnv
+from gymnasium.vector.utils import batch_space
+
+from hurry_taxi.envs.local_view import LocalView
+from hurry_taxi.envs.road_map import (
+    CONNECTED_SIDE_COUNTS,
+    CONNECTED_SIDE_TABLE,
+    NOTHING,
+    NPC_ACTION_COUNTS,
+    NPC_ACTION_TABLE,
+    load_road_map,
+)
+from hurry_taxi.envs.routes import RouteTable
+from hurry_taxi.envs.taxi_grid import (
+    Events,
+    NO_EVENT,
+    SPARE_ROWS,
+    TaxiGridEnv,
+    action_space_for,
+    observation_blocks,
+    observation_space_for,
+    observed_state_layout,
+)
+
+
+class TaxiGridVectorEnv(VectorEnv):
+    """Steps num_envs taxi worlds at once with array operations over the batch.
+
+    Every world follows the same rules as TaxiGridEnv and produces the same
+    observations. Worlds that terminate are reset on the following step, like
+    SyncVectorEnv does.
+    """
+
+    metadata = {"render_modes": [], "autoreset_mode": "NextStep"}
+
+    def __init__(self, num_envs, grid_size=25, max_steps=1000, agents_number=2, npc_number=4, render_mode=None, map_options=None, action_type="continuous", obs_type="flat", view_size=7):
+        if render_mode is not None:
+            raise ValueError("TaxiGridVectorEnv does not support rendering")
+        self.num_envs = num_envs
+        self.grid_size = grid_size
+        self.map_options = map_options
+        self.max_steps = max_steps
+        self.agents_number = agents_number
+        self.max_passengers = 2 * self.agents_number
+        self.number_of_npcs = npc_number
+        self.render_mode = render_mode
+
+        self.obs_type = obs_type
+        self.view_size = view_size
+        self._obs_blocks = observation_blocks(self.agents_number, self.number_of_npcs, self.max_passengers)
+        self._flat_obs_dim = sum(size for _, size in self._obs_blocks)
+        self.single_observation_space = observation_space_for(
+            obs_type, self._flat_obs_dim, self.grid_size, self.agents_number, self.view_size
+        )
+        self.action_type = action_type
+        self.single_action_space, self._decode_actions = action_space_for(action_type, self.agents_number)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+        self._action_vectors = np.array(
+            [[1, 0], [0, -1], [-1, 0], [0, 1], [0, 0]], dtype=np.int16
+        )
+        self._event_rewards = np.array(
+            [TaxiGridEnv._get_reward(None)] + [TaxiGridEnv._get_reward(event) for event in Events]
+        )
+
+        self._load_map()
+        self._init_state()
+        self._autoreset_envs = np.zeros(num_envs, dtype=bool)
+
+    def _load_map(self):
+        self.road_map = load_road_map(self.grid_size, self.map_options)
+        self.map = self.road_map.layout
+        self._connections = self.road_map.connections
+        self._routes = None
+
+    @property
+    def routes(self):
+        # Built, or loaded from the map cache, on first use
+        if self._routes is None:
+            self._routes = RouteTable(self.road_map)
+        return self._routes
+
+    def distance(self, a, b):
+        return self.routes.distance(a, b)
+
+    def next_action(self, a, b):
+        return self.routes.next_action(a, b)
+
+    def _init_state(self):
+        # Same layout as TaxiGridEnv with a leading world axis: observed state
+        # lives in one int16 block per world, passenger blocks keep a spare slot
+        num_envs = self.num_envs
+        passenger_slots = self.max_passengers + 1
+        self._observed_state, self._obs, blocks, self._obs_copies = observed_state_layout(
+            self._obs_blocks, SPARE_ROWS, (num_envs,)
+        )
+
+        self._agent_locations = blocks["agent_locations"].reshape(num_envs, self.agents_number, 2)
+        self._agent_directions = blocks["agent_directions"]
+        self._agent_has_passenger = blocks["agent_passenger_status"]
+        self._agent_destinations = blocks["passenger_destinations"].reshape(num_envs, self.agents_number, 2)
+        self._npc_locations = blocks["npc_locations"].reshape(num_envs, self.number_of_npcs, 2)
+        self._npc_directions = blocks["npc_directions"]
+        self._passenger_valid = blocks["passenger_status"]
+        self._passenger_locations = blocks["passenger_locations"].reshape(num_envs, passenger_slots, 2)
+        self._passenger_destinations = np.zeros((num_envs, passenger_slots, 2), dtype=np.int16)
+        self._step_counts = np.zeros(num_envs, dtype=np.int64)
+        self._events = np.full((num_envs, self.agents_number), NO_EVENT, dtype=np.int8)
+        self._rewards = np.zeros(num_envs, dtype=np.float64)
+        self._terminations = np.zeros(num_envs, dtype=bool)
+        self._truncations = np.zeros(num_envs, dtype=bool)
+        self._local_view = None
+        if self.obs_type == "local":
+            self._local_view = LocalView(self.road_map, self.view_size, num_envs)
+            self._obs = np.zeros((num_envs,) + self.single_observation_space.shape, dtype=np.uint8)
+
+    def reset(self, seed=None, options=None):
+        if isinstance(seed, (list, tuple)):
+            seed = seed[0]
+        if seed is not None:
+            self._np_random, self._np_random_seed = seeding.np_random(seed)
+        self._reset_worlds(np.ones(self.num_envs, dtype=bool))
+        self._autoreset_envs.fill(False)
+        return self._observe(), self._get_info()
+
+    def step(self, actions):
+        self._step_worlds(self._decode_actions(actions))
+        if self._autoreset_envs.any():
+            self._reset_worlds(self._autoreset_envs)
+            self._rewards[self._autoreset_envs] = 0.0
+            self._terminations[self._autoreset_envs] = False
+        np.logical_or(self._terminations, self._truncations, out=self._autoreset_envs)
+        return (
+            self._observe(),
+            self._rewards.copy(),
+            self._terminations.copy(),
+            self._truncations.copy(),
+            self._get_info(),
+        )
+
+    def _observe(self):
+        if self._local_view is None:
+            for obs_run, state_run in self._obs_copies:
+                np.copyto(obs_run, state_run)
+        else:
+            self._local_view.observe(
+                self._obs,
+                self._agent_locations,
+                self._agent_has_passenger,
+                self._agent_destinations,
+                self._npc_locations,
+                self._npc_directions,
+                self._passenger_locations,
+                self._passenger_valid,
+            )
+        return self._obs.copy()
+
+    def _get_info(self):
+        return {
+            "waiting_passengers": np.count_nonzero(self._passenger_valid, axis=1),
+            "_waiting_passengers": np.ones(self.num_envs, dtype=bool),
+        }
+
+    def _step_worlds(self, actions):
+        self._events.fill(NO_EVENT)
+        new_locations = self._agent_locations + self._action_vectors[actions]
+        self._handle_collision(new_locations)
+        np.copyto(self._agent_directions, actions, where=actions != NOTHING)
+        self._handle_pick_passengers()
+        self._handle_drop_passenger()
+        self._handle_new_waiting_passengers()
+        self._move_npcs()
+
+        self._step_counts += 1
+        np.greater_equal(self._step_counts, self.max_steps, out=self._terminations)
+        rewards = self._event_rewards[self._events + 1].sum(axis=1)
+        np.divide(rewards, self.agents_number, out=self._rewards)
+
+    def _handle_collision(self, new_locations):
+        off_road = self.road_map.padded_roads[new_locations[..., 1] + 1, new_locations[..., 0] + 1] == 0
+        collisions = off_road | self._hits_other_car(new_locations)
+        self._events[collisions] = Events.collision.value
+        np.copyto(self._agent_locations, new_locations, where=~collisions[..., None])
+
+    def _hits_other_car(self, locations):
+        if self.number_of_npcs == 0:
+            return np.zeros(locations.shape[:2], dtype=bool)
+        agent_cells = self._cell_ids(locations)
+        npc_cells = self._cell_ids(self._npc_locations)
+        same_cell = agent_cells[:, :, None] == npc_cells[:, None, :]
+        same_direction = self._agent_directions[:, :, None] == self._npc_directions[:, None, :]
+        return (same_cell & same_direction).any(axis=2)
+
+    def _cell_ids(self, locations):
+        # Unique per cell, including cells one step outside the grid
+        width = self.grid_size + 2
+        return (locations[..., 1].astype(np.int32) + 1) * width + locations[..., 0] + 1
+
+    def _handle_pick_passengers(self):
+        # Every free agent takes the earliest waiting passenger next to it
+        distances = np.abs(
+            self._agent_locations[:, :, None, :] - self._passenger_locations[:, None, :, :]
+        ).sum(axis=3)
+        near = (distances == 1) & (self._passenger_valid != 0)[:, None, :]
+        near &= (self._agent_has_passenger == 0)[:, :, None]
+        picking = near.any(axis=2)
+        if not picking.any():
+            return
+        worlds, agents = np.nonzero(picking)
+        slots = near[worlds, agents].argmax(axis=1)
+        self._agent_has_passenger[worlds, agents] = 1
+        self._agent_destinations[worlds, agents] = self._passenger_destinations[worlds, slots]
+        self._events[worlds, agents] = Events.takes_passenger.value
+        picked = np.zeros(self._passenger_valid.shape, dtype=bool)
+        picked[worlds, slots] = True
+        self._remove_passengers(picked)
+
+    def _remove_passengers(self, picked):
+        # Compact the remaining passengers to the front, keeping their order
+        worlds = np.flatnonzero(picked.any(axis=1))
+        keep = (self._passenger_valid[worlds] != 0) & ~picked[worlds]
+        order = np.argsort(~keep, axis=1, kind="stable")
+        waiting = np.count_nonzero(keep, axis=1)
+        valid = np.arange(keep.shape[1])[None, :] < waiting[:, None]
+        for passenger_array in (self._passenger_locations, self._passenger_destinations):
+            rows = np.take_along_axis(passenger_array[worlds], order[:, :, None], axis=1)
+            rows *= valid[:, :, None]
+            passenger_array[worlds] = rows
+        self._passenger_valid[worlds] = valid
+
+    def _handle_drop_passenger(self):
+        distances = np.abs(self._agent_locations - self._agent_destinations).sum(axis=2)
+        arrived = (self._agent_has_passenger == 1) & (distances == 1)
+        if not arrived.any():
+            return
+        self._agent_has_passenger[arrived] = 0
+        self._agent_destinations[arrived] = 0
+        self._events[arrived] = Events.leaves_passenger.value
+
+    def _handle_new_waiting_passengers(self):
+        waiting = np.count_nonzero(self._passenger_valid, axis=1)
+        spawning = (self._step_counts % 30 == 0) & (waiting <= 2 * self.agents_number)
+        if spawning.any():
+            self._add_passengers(np.flatnonzero(spawning))
+
+    def _add_passengers(self, worlds):
+        curb_cells = self.road_map.curb_cells
+        cells = curb_cells[self.np_random.integers(len(curb_cells), size=(len(worlds), 2))]
+        slots = np.count_nonzero(self._passenger_valid[worlds], axis=1)
+        self._passenger_locations[worlds, slots] = cells[:, 0]
+        self._passenger_destinations[worlds, slots] = cells[:, 1]
+        self._passenger_valid[worlds, slots] = 1
+
+    def _move_npcs(self):
+        if self.number_of_npcs == 0:
+            return
+        masks = self._connections[self._npc_locations[..., 1], self._npc_locations[..., 0]]
+        choices = self.np_random.random(masks.shape, dtype=np.float32) * NPC_ACTION_COUNTS[masks]
+        npc_actions = NPC_ACTION_TABLE[masks, choices.astype(np.intp)]
+        self._npc_locations += self._action_vectors[npc_actions]
+        np.copyto(self._npc_directions, npc_actions, where=npc_actions != NOTHING)
+
+    def _random_directions(self, masks):
+        choices = self.np_random.random(masks.shape, dtype=np.float32) * CONNECTED_SIDE_COUNTS[masks]
+        return CONNECTED_SIDE_TABLE[masks, choices.astype(np.intp)]
+
+    def _reset_worlds(self, mask):
+        worlds = np.flatnonzero(mask)
+        count = len(worlds)
+        rng = self.np_random
+
+        road_cells = self.road_map.road_cells
+        road_cell_connections = self.road_map.road_cell_connections
+
+        cells = rng.integers(len(road_cells), size=(count, self.agents_number))
+        self._agent_locations[worlds] = road_cells[cells]
+        self._agent_directions[worlds] = self._random_directions(road_cell_connections[cells])
+        self._agent_has_passenger[worlds] = 0
+        self._agent_destinations[worlds] = 0
+
+        self._passenger_valid[worlds] = 0
+        self._passenger_locations[worlds] = 0
+        self._passenger_destinations[worlds] = 0
+        self._add_passengers(worlds)
+
+        cells = rng.integers(len(road_cells), size=(count, self.number_of_npcs))
+        self._npc_locations[worlds] = road_cells[cells]
+        self._npc_directions[worlds] = self._random_directions(road_cell_connections[cells])
+
+        self._step_counts[worlds] = 0
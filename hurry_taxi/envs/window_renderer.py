@@ -0,0 +1,207 @@
+import pygame
+
+from hurry_taxi.envs import sprite_cache
+from hurry_taxi.envs.road_map import ROAD_TYPES
+from hurry_taxi.envs.taxi_grid import Directions
+
+CAR_ANGLES = {
+    Directions.north: 0,
+    Directions.east: -90,
+    Directions.south: 180,
+    Directions.west: 90,
+}
+
+
+class WindowRenderer:
+    """Human render mode of TaxiGridEnv, drawn with pygame in a window.
+
+    TaxiGridEnv imports this module on its first human render, so headless
+    runs never load pygame.
+    """
+
+    def __init__(self, env):
+        self.window_size = env.window_size
+        self.grid_size = env.grid_size
+        self.render_fps = env.metadata["render_fps"]
+        self.pix_square_size = self.window_size / self.grid_size
+
+        pygame.init()
+        pygame.display.init()
+        self.window = pygame.display.set_mode((self.window_size, self.window_size))
+        self.clock = pygame.time.Clock()
+
+        self._load_assets()
+        self._render_static_layer(env)
+        self.canvas = self._background.copy()
+        self._dirty_rects = [self.canvas.get_rect()]
+
+    def render(self, env):
+        # Erase the sprites drawn on the previous frame
+        for rect in self._dirty_rects:
+            self.canvas.blit(self._background, rect, rect)
+
+        drawn_rects = (
+            self._render_passengers(env)
+            + self._render_destinations(env)
+            + self._render_agents(env)
+            + self._render_npcs(env)
+        )
+
+        update_rects = self._dirty_rects + drawn_rects
+        for rect in update_rects:
+            self.window.blit(self.canvas, rect, rect)
+        pygame.event.pump()
+        pygame.display.update(update_rects)
+        self._dirty_rects = drawn_rects
+
+        self.clock.tick(self.render_fps)
+
+    def close(self):
+        pygame.display.quit()
+        pygame.quit()
+
+    def get_sprite(self, road_type):
+        return self.road_sprite.get(road_type)
+
+    def _render_static_layer(self, env):
+        self._background = pygame.Surface((self.window_size, self.window_size))
+        self._background.fill((255, 255, 255))
+        self._render_background(self._background)
+        self._render_roads(self._background, env)
+
+    def _render_agents(self, env):
+        rects = []
+        for agent in env._agents:
+            agent_position = (
+                int(agent["location"][0] * self.pix_square_size),
+                int(agent["location"][1] * self.pix_square_size),
+            )
+            rects.append(self._render_car("taxi", agent_position, agent["direction"]))
+        return rects
+
+    def _render_passengers(self, env):
+        return [self._render_passenger(passenger) for passenger in env._waiting_passengers]
+
+    def _render_passenger(self, passenger):
+        tile_position = (
+            int(passenger["location"][0] * self.pix_square_size),
+            int(passenger["location"][1] * self.pix_square_size),
+        )
+
+        passenger_position = self._get_passenger_position(tile_position, passenger["direction"])
+        person_sprite = self.character_sprites[(f"{passenger['hair']}_{passenger['shirt']}", passenger["direction"])]
+        return self.canvas.blit(person_sprite, passenger_position)
+
+    def _render_destinations(self, env):
+        rects = []
+        for agent in env._agents:
+            if agent["has_passenger"]:
+                passenger = agent["passenger"]
+                tile_position = (
+                    int(passenger["destination"][0] * self.pix_square_size),
+                    int(passenger["destination"][1] * self.pix_square_size),
+                )
+                rects.append(pygame.draw.rect(
+                    self.canvas,
+                    (255, 0, 0),
+                    (tile_position[0], tile_position[1], int(self.pix_square_size), int(self.pix_square_size)),
+                    width=2
+                ))
+        return rects
+
+    def _get_passenger_position(self, tile_position, direction):
+        x, y = tile_position
+        delta_to_middle = int(self.pix_square_size / 4)
+        delta_to_side = int(self.pix_square_size / 2)
+        match direction:
+            case "right":
+                return (x + delta_to_side, y + delta_to_middle)
+            case "up":
+                return (x + delta_to_middle, y)
+            case "left":
+                return (x, y + delta_to_middle)
+            case "down":
+                return (x + delta_to_middle, y + delta_to_side)
+            case _:
+                return tile_position
+
+    def _get_passenger_angle(self, direction):
+        match direction:
+            case "right":
+                return 90
+            case "up":
+                return 180
+            case "left":
+                return -90
+            case "down":
+                return 0
+            case _:
+                raise ValueError("Invalid direction")
+
+    def _render_npcs(self, env):
+        rects = []
+        for npc in env.npcs:
+            npc_position = (
+                int(npc["location"][0] * self.pix_square_size),
+                int(npc["location"][1] * self.pix_square_size),
+            )
+            rects.append(self._render_car(npc["color"], npc_position, npc["direction"]))
+        return rects
+
+    def _render_roads(self, surface, env):
+        for x in range(self.grid_size):
+            for y in range(self.grid_size):
+                position = (int(x * self.pix_square_size), int(y * self.pix_square_size))
+                if env.road_map.roads[y, x] == 1:
+                    sprite = self.road_sprite.get(ROAD_TYPES[env.road_map.connections[y, x]])
+                    if sprite:
+                        surface.blit(sprite, position)
+
+    def _render_background(self, surface):
+        background_sprite = self.road_sprite['grass']
+        sprite_width, sprite_height = background_sprite.get_size()
+        canvas_width, canvas_height = surface.get_size()
+
+        for x in range(0, canvas_width, sprite_width):
+            for y in range(0, canvas_height, sprite_height):
+                surface.blit(background_sprite, (x, y))
+
+    def _load_assets(self):
+        tile_size = int(self.pix_square_size)
+        self.road_sprite = {
+            name: sprite_cache.get_sprite(path, 0, (tile_size, tile_size))
+            for name, path in sprite_cache.ROAD_ASSETS.items()
+        }
+        self.car_sprites = {
+            (name, direction): sprite_cache.get_sprite(
+                path, CAR_ANGLES[direction], self._get_car_dimensions(direction)
+            )
+            for name, path in sprite_cache.CAR_ASSETS.items()
+            for direction in Directions
+        }
+        self.character_sprites = {
+            (name, side): sprite_cache.get_sprite(
+                path, self._get_passenger_angle(side), (tile_size // 2, tile_size // 2)
+            )
+            for name, path in sprite_cache.CHARACTER_ASSETS.items()
+            for side in ["right", "up", "left", "down"]
+        }
+
+    def _render_car(self, car_name, tile_position, direction):
+        position = self._get_car_position(tile_position, direction)
+        return self.canvas.blit(self.car_sprites[(car_name, direction)], position)
+
+    def _get_car_dimensions(self, direction):
+        if direction == Directions.east or direction == Directions.west:
+            return (int(self.pix_square_size), int(self.pix_square_size) // 2)
+        return (int(self.pix_square_size) // 2, int(self.pix_square_size))
+
+    def _get_car_position(self, location, direction):
+        x, y = location
+        match direction:
+            case Directions.east:
+                return (x, y + int(self.pix_square_size / 2))
+            case Directions.north:
+                return (x + int(self.pix_square_size / 2), y)
+            case _:
+                return location
@@ -0,0 +1,3 @@
+from hurry_taxi.monitoring.episode_log import EpisodeLogger, episode_log_path, load_episode_log
+from hurry_taxi.monitoring.log_reader import LogReader, get_reader
+from hurry_taxi.monitoring.summary import CurveSummary, summary_path, update_summary
@@ -0,0 +1,103 @@
+import os
+import time
+
+import gymnasium as gym
+import numpy as np
+
+from hurry_taxi.envs.taxi_grid import Events
+
+EPISODE_LOG_SUFFIX = ".episodes.bin"
+
+# One fixed-width little-endian record per finished episode. Files have no
+# header, so every worker of a run can append to the same file.
+EPISODE_RECORD = np.dtype([
+    ("return", "<f8"),
+    ("length", "<u4"),
+    ("pickups", "<u4"),
+    ("dropoffs", "<u4"),
+    ("collisions", "<u4"),
+    ("wall_time", "<f8"),
+    ("worker", "<u4"),
+])
+
+
+def episode_log_path(folder, run_name):
+    return os.path.join(folder, run_name + EPISODE_LOG_SUFFIX)
+
+
+def load_episode_log(path):
+    # Memory-mapped records of a run. A record still being appended is left out.
+    count = os.path.getsize(path) // EPISODE_RECORD.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=EPISODE_RECORD)
+    return np.memmap(path, dtype=EPISODE_RECORD, mode="r", shape=(count,))
+
+
+class EpisodeLogWriter:
+    def __init__(self, path, worker_id=0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # With O_APPEND each record lands whole at the end of the file, even
+        # when several processes write to it
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.path = path
+        self.worker_id = worker_id
+        self._record = np.zeros(1, dtype=EPISODE_RECORD)
+
+    def write(self, episode_return, length, pickups, dropoffs, collisions):
+        self._record[0] = (episode_return, length, pickups, dropoffs, collisions, time.time(), self.worker_id)
+        os.write(self._fd, self._record.tobytes())
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class EpisodeLogger(gym.Wrapper):
+    """Appends a record of every finished episode to a run's episode log.
+
+    Like Stable-Baselines3's Monitor it also sets info["episode"], so the
+    training logger still reports episode returns and lengths.
+    """
+
+    def __init__(self, env, path, worker_id=0):
+        super().__init__(env)
+        self.writer = EpisodeLogWriter(path, worker_id)
+        self._start_time = time.time()
+        self._clear_episode()
+
+    def _clear_episode(self):
+        self._return = 0.0
+        self._length = 0
+        self._event_counts = np.zeros(len(Events), dtype=np.int64)
+
+    def reset(self, **kwargs):
+        self._clear_episode()
+        return self.env.reset(**kwargs)
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        self._return += reward
+        self._length += 1
+        events = self.env.unwrapped._events
+        self._event_counts += np.bincount(events[events >= 0], minlength=len(Events))
+        if terminated or truncated:
+            self.writer.write(
+                self._return,
+                self._length,
+                self._event_counts[Events.takes_passenger.value],
+                self._event_counts[Events.leaves_passenger.value],
+                self._event_counts[Events.collision.value],
+            )
+            info["episode"] = {
+                "r": round(self._return, 6),
+                "l": self._length,
+                "t": round(time.time() - self._start_time, 6),
+            }
+        return obs, reward, terminated, truncated, info
+
+    def close(self):
+        self.writer.close()
+        super().close()
@@ -0,0 +1,144 @@
+import os
+import time
+
+import numpy as np
+
+from hurry_taxi.monitoring.episode_log import EPISODE_RECORD
+
+# Episode log fields under the names Monitor CSVs use
+EPISODE_COLUMNS = {"return": "r", "length": "l"}
+
+# Bytes at the start of a file kept to recognize it, since a replaced file
+# can reuse the inode of the one it replaces
+HEAD_BYTES = 64
+
+# Readers shared by every caller in the process, keyed by path
+_readers = {}
+
+
+def get_reader(path):
+    reader = _readers.get(path)
+    if reader is None:
+        reader = LogReader(path)
+        _readers[path] = reader
+    return reader
+
+
+class LogReader:
+    """Incremental reader of an episode log or a Monitor CSV that may still grow.
+
+    update() parses only the complete rows appended since the last call and
+    keeps them as chunks of column arrays. A file whose inode, size and
+    mtime did not change is not opened. A file that was replaced, shrank or
+    now starts with other bytes is read again from the start. With
+    keep_rows off, rows are only returned by update(), for callers that fold
+    them into their own statistics.
+    """
+
+    def __init__(self, path, keep_rows=True):
+        self.path = path
+        self.is_csv = path.endswith(".csv")
+        self.keep_rows = keep_rows
+        # Grows whenever new rows are parsed or the file is read again from
+        # the start, so callers can cache on it
+        self.version = 0
+        self.restart()
+
+    def restart(self):
+        self.offset = 0
+        self.version += 1
+        self._stat = None
+        self._head = b""
+        self._names = None
+        self._chunks = []
+        self._columns = None
+
+    def seek(self, offset, names=None, head=b""):
+        # Resumes after rows read by an earlier reader, names being the
+        # CSV header it found and head the start of the file it read
+        self.restart()
+        self.offset = offset
+        self._names = names
+        self._head = head
+
+    @property
+    def names(self):
+        return self._names
+
+    @property
+    def head(self):
+        return self._head
+
+    def update(self):
+        # Columns of the newly appended rows, empty when there are none
+        stat = os.stat(self.path)
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if key == self._stat:
+            return {}
+        if self._stat is not None and (stat.st_ino != self._stat[0] or stat.st_size <= self._stat[1]):
+            self.restart()
+        with open(self.path, "rb") as file:
+            head = file.read(min(HEAD_BYTES, stat.st_size))
+            if head[: len(self._head)] != self._head[: len(head)]:
+                self.restart()
+            if len(head) > len(self._head):
+                self._head = head
+            file.seek(self.offset)
+            data = file.read(stat.st_size - self.offset)
+        self._stat = key
+
+        rows, consumed = self._parse_csv(data) if self.is_csv else self._parse_episodes(data)
+        self.offset += consumed
+        if not rows or len(rows["r"]) == 0:
+            return {}
+        if self.keep_rows:
+            self._chunks.append(rows)
+            self._columns = None
+        self.version += 1
+        return rows
+
+    def _parse_episodes(self, data):
+        count = len(data) // EPISODE_RECORD.itemsize
+        records = np.frombuffer(data, dtype=EPISODE_RECORD, count=count)
+        return {EPISODE_COLUMNS.get(name, name): records[name] for name in EPISODE_RECORD.names}, count * EPISODE_RECORD.itemsize
+
+    def _parse_csv(self, data):
+        # Only whole lines are consumed, a line being written waits for the next call
+        consumed = data.rfind(b"\n") + 1
+        lines = data[:consumed].decode().splitlines()
+        if self._names is None:
+            lines = [line for line in lines if not line.startswith("#")]
+            if not lines:
+                return {}, consumed
+            self._names = lines.pop(0).split(",")
+        if not lines:
+            return {}, consumed
+        table = np.loadtxt(lines, delimiter=",", ndmin=2)
+        rows = {name: table[:, index] for index, name in enumerate(self._names)}
+        rows["l"] = rows["l"].astype(np.int64)
+        return rows, consumed
+
+    def columns(self):
+        # Every row read so far, concatenated once per new chunk
+        if self._columns is None:
+            if not self._chunks:
+                return {}
+            self._columns = {
+                name: np.concatenate([chunk[name] for chunk in self._chunks]) for name in self._chunks[0]
+            }
+            self._chunks = [self._columns]
+        return self._columns
+
+    def follow(self, interval=2.0, idle_timeout=None):
+        # Yields rows as they are appended, polling every interval seconds,
+        # until nothing new arrives for idle_timeout seconds
+        last_rows = time.monotonic()
+        while True:
+            rows = self.update() if os.path.exists(self.path) else {}
+            if rows:
+                last_rows = time.monotonic()
+                yield rows
+            elif idle_timeout is not None and time.monotonic() - last_rows >= idle_timeout:
+                return
+            else:
+                time.sleep(interval)
@@ -0,0 +1,198 @@
+import os
+
+import numpy as np
+
+from hurry_taxi.monitoring.log_reader import LogReader
+
+SUMMARY_SUFFIX = ".summary.npz"
+QUANTILES = np.array([0.1, 0.25, 0.5, 0.75, 0.9])
+
+
+def summary_path(folder, run_name):
+    return os.path.join(folder, run_name + SUMMARY_SUFFIX)
+
+
+class CurveSummary:
+    """Statistics of episode returns per bucket of training steps.
+
+    An episode falls in the bucket of the env steps its worker had taken
+    when it ended. Every bucket keeps its count, mean and sum of squared
+    deviations, merged chunk by chunk with Welford's update in its parallel
+    (Chan et al.) form. It also keeps a uniform sample of at most
+    sample_size returns for quantiles: the values with the lowest random
+    priorities seen so far.
+    """
+
+    def __init__(self, bucket_steps, sample_size=64, seed=0):
+        self.bucket_steps = bucket_steps
+        self.sample_size = sample_size
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+        self.samples = np.full((0, sample_size), np.nan)
+        self.priorities = np.full((0, sample_size), np.inf)
+        # Env steps each worker has taken so far
+        self.worker_steps = {}
+        # Bytes of each source log already added, the CSV header found and
+        # the first bytes read, to recognize a source that was replaced
+        self.offsets = {}
+        self.names = {}
+        self.heads = {}
+
+    def _grow(self, buckets):
+        extra = buckets - len(self.count)
+        if extra <= 0:
+            return
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self.mean = np.concatenate([self.mean, np.zeros(extra)])
+        self.m2 = np.concatenate([self.m2, np.zeros(extra)])
+        self.samples = np.concatenate([self.samples, np.full((extra, self.sample_size), np.nan)])
+        self.priorities = np.concatenate([self.priorities, np.full((extra, self.sample_size), np.inf)])
+
+    def add(self, returns, lengths, workers):
+        # Episodes in log order, so each worker's episodes are in the order it ran them
+        returns = np.asarray(returns, dtype=np.float64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        workers = np.asarray(workers, dtype=np.int64)
+        if len(returns) == 0:
+            return
+        ends = np.empty(len(lengths), dtype=np.int64)
+        for worker in np.unique(workers):
+            rows = workers == worker
+            ends[rows] = self.worker_steps.get(int(worker), 0) + np.cumsum(lengths[rows])
+            self.worker_steps[int(worker)] = int(ends[rows][-1])
+        buckets = (ends - 1) // self.bucket_steps
+        self._grow(int(buckets.max()) + 1)
+
+        size = len(self.count)
+        count = np.bincount(buckets, minlength=size)
+        present = count > 0
+        chunk_mean = np.zeros(size)
+        chunk_mean[present] = np.bincount(buckets, weights=returns, minlength=size)[present] / count[present]
+        chunk_m2 = np.bincount(buckets, weights=(returns - chunk_mean[buckets]) ** 2, minlength=size)
+        total = self.count + count
+        delta = chunk_mean - self.mean
+        self.mean[present] += delta[present] * count[present] / total[present]
+        self.m2[present] += chunk_m2[present] + delta[present] ** 2 * self.count[present] * count[present] / total[present]
+        self.count = total
+        self._sample(returns, buckets)
+
+    def _sample(self, returns, buckets):
+        # Every touched bucket brings its sample_size current slots, empty
+        # ones at infinite priority, so exactly sample_size values survive
+        touched = np.unique(buckets)
+        all_buckets = np.concatenate([np.repeat(touched, self.sample_size), buckets])
+        priorities = np.concatenate([self.priorities[touched].reshape(-1), self.rng.random(len(returns))])
+        values = np.concatenate([self.samples[touched].reshape(-1), returns])
+        order = np.lexsort((priorities, all_buckets))
+        sorted_buckets = all_buckets[order]
+        first = np.searchsorted(sorted_buckets, sorted_buckets)
+        keep = order[np.arange(len(order)) - first < self.sample_size]
+        self.priorities[touched] = priorities[keep].reshape(-1, self.sample_size)
+        self.samples[touched] = values[keep].reshape(-1, self.sample_size)
+
+    def statistics(self):
+        # Per non-empty bucket: the training step it ends at, and the episode
+        # count, mean, standard deviation and QUANTILES of its returns
+        present = np.flatnonzero(self.count)
+        count = self.count[present]
+        std = np.full(len(present), np.nan)
+        several = count > 1
+        std[several] = np.sqrt(self.m2[present][several] / (count[several] - 1))
+        return {
+            "steps": (present + 1) * self.bucket_steps,
+            "count": count,
+            "mean": self.mean[present],
+            "std": std,
+            "quantiles": np.nanquantile(self.samples[present], QUANTILES, axis=1) if len(present) else np.zeros((len(QUANTILES), 0)),
+        }
+
+    def save(self, path):
+        sources = sorted(self.offsets)
+        workers = sorted(self.worker_steps)
+        temporary = path + ".tmp.npz"
+        np.savez(
+            temporary,
+            settings=np.array([self.bucket_steps, self.sample_size, self.seed]),
+            count=self.count,
+            mean=self.mean,
+            m2=self.m2,
+            samples=self.samples,
+            priorities=self.priorities,
+            workers=np.array(workers, dtype=np.int64),
+            worker_steps=np.array([self.worker_steps[worker] for worker in workers], dtype=np.int64),
+            sources=np.array(sources, dtype=str),
+            offsets=np.array([self.offsets[source] for source in sources], dtype=np.int64),
+            names=np.array([",".join(self.names.get(source) or []) for source in sources], dtype=str),
+            heads=np.array([self.heads.get(source, b"").hex() for source in sources], dtype=str),
+        )
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            bucket_steps, sample_size, seed = data["settings"].tolist()
+            summary = cls(bucket_steps, sample_size, seed)
+            for name in ["count", "mean", "m2", "samples", "priorities"]:
+                setattr(summary, name, data[name])
+            summary.worker_steps = dict(zip(data["workers"].tolist(), data["worker_steps"].tolist()))
+            summary.offsets = dict(zip(data["sources"].tolist(), data["offsets"].tolist()))
+            summary.names = {
+                source: names.split(",") if names else None
+                for source, names in zip(data["sources"].tolist(), data["names"].tolist())
+            }
+            if "heads" in data:
+                summary.heads = dict(zip(data["sources"].tolist(), map(bytes.fromhex, data["heads"].tolist())))
+        # New draws continue from a generator that depends on what was added
+        summary.rng = np.random.default_rng([seed, int(summary.count.sum())])
+        return summary
+
+
+def _is_read_source(summary, source, key):
+    # Whether source is still the file the summary read its first bytes
+    # from, now at least as long as what was added
+    offset = summary.offsets.get(key, 0)
+    if offset == 0:
+        return True
+    head = summary.heads.get(key)
+    if head is None or os.path.getsize(source) < offset:
+        return False
+    with open(source, "rb") as file:
+        return file.read(len(head)) == head
+
+
+def update_summary(path, sources, bucket_steps, sample_size=64):
+    """Folds what the source logs gained since the summary at path was saved into it.
+
+    sources are either one episode log, whose records carry their worker,
+    or Monitor CSVs, one per worker. The summary is rebuilt when its
+    settings differ or a source was replaced, and saved whenever it changes.
+    """
+    summary = CurveSummary.load(path) if os.path.exists(path) else None
+    folder = os.path.dirname(path)
+    keys = [os.path.relpath(source, folder) for source in sources]
+    if (
+        summary is None
+        or summary.bucket_steps != bucket_steps
+        or summary.sample_size != sample_size
+        or not all(_is_read_source(summary, source, key) for source, key in zip(sources, keys))
+    ):
+        summary = CurveSummary(bucket_steps, sample_size)
+
+    changed = not os.path.exists(path)
+    for worker, (source, key) in enumerate(zip(sources, keys)):
+        reader = LogReader(source, keep_rows=False)
+        reader.seek(summary.offsets.get(key, 0), summary.names.get(key), summary.heads.get(key, b""))
+        rows = reader.update()
+        if rows:
+            workers = rows["worker"] if "worker" in rows else np.full(len(rows["r"]), worker)
+            summary.add(rows["r"], rows["l"], workers)
+            changed = True
+        summary.offsets[key] = reader.offset
+        summary.names[key] = reader.names
+        summary.heads[key] = reader.head
+    if changed:
+        summary.save(path)
+    return summary
@@ -0,0 +1 @@
+from hurry_taxi.policies.dispatcher import GreedyDispatcher
@@ -0,0 +1,86 @@
+import numpy as np
+
+from hurry_taxi.envs.road_map import NOTHING
+from hurry_taxi.envs.routes import UNREACHABLE
+from hurry_taxi.envs.taxi_grid import observation_blocks
+
+
+def discrete_to_continuous_action(discrete_actions):
+    # Centre of the continuous interval that TaxiGridEnv decodes to each action
+    discrete_actions = np.asarray(discrete_actions)
+    return np.where(discrete_actions == NOTHING, 1.0, discrete_actions / 2 - 0.75).astype(np.float32)
+
+
+class GreedyDispatcher:
+    """Scripted policy that drives every taxi along road shortest paths.
+
+    Loaded taxis head to their passenger's destination. Free taxis are
+    matched to waiting passengers closest pair first, so no two taxis chase
+    the same passenger, and taxis left without one stay still. Observations
+    can be a single one or a batch, from TaxiGridEnv or TaxiGridVectorEnv.
+    """
+
+    def __init__(self, env):
+        env = getattr(env, "unwrapped", env)
+        if env.obs_type != "flat":
+            raise ValueError("GreedyDispatcher reads flat observations")
+        self.agents_number = env.agents_number
+        self.max_passengers = env.max_passengers
+        self.action_type = env.action_type
+        self.routes = env.routes
+        self._blocks = {}
+        offset = 0
+        for name, size in observation_blocks(env.agents_number, env.number_of_npcs, env.max_passengers):
+            self._blocks[name] = slice(offset, offset + size)
+            offset += size
+
+    def _read(self, obs, name, width=1):
+        block = obs[:, self._blocks[name]].astype(np.intp)
+        return block.reshape(len(obs), -1, width) if width > 1 else block
+
+    def discrete_actions(self, obs):
+        obs = np.asarray(obs)
+        single = obs.ndim == 1
+        obs = np.atleast_2d(obs)
+        count = len(obs)
+        agent_locations = self._read(obs, "agent_locations", 2)
+        loaded = self._read(obs, "agent_passenger_status") != 0
+        destinations = self._read(obs, "passenger_destinations", 2)
+        waiting = self._read(obs, "passenger_status") != 0
+        passenger_locations = self._read(obs, "passenger_locations", 2)
+
+        # Road cell each taxi heads to, or -1 when it has nowhere to go
+        targets = np.full((count, self.agents_number), -1, dtype=np.intp)
+
+        drop_distances, drop_roads = self.routes.closest_adjacent_road(agent_locations, destinations)
+        delivering = loaded & (drop_distances != UNREACHABLE)
+        targets[delivering] = drop_roads[delivering]
+
+        pick_distances, pick_roads = self.routes.closest_adjacent_road(
+            agent_locations[:, :, None, :], passenger_locations[:, None, :, :]
+        )
+        costs = pick_distances.astype(np.int64)
+        costs[loaded] = UNREACHABLE
+        costs[~np.broadcast_to(waiting[:, None, :], costs.shape)] = UNREACHABLE
+        worlds = np.arange(count)
+        for _ in range(min(self.agents_number, self.max_passengers)):
+            best = costs.reshape(count, -1).argmin(axis=1)
+            agents, passengers = np.divmod(best, self.max_passengers)
+            matched = costs[worlds, agents, passengers] < UNREACHABLE
+            if not matched.any():
+                break
+            matched_worlds = worlds[matched]
+            targets[matched_worlds, agents[matched]] = pick_roads[matched_worlds, agents[matched], passengers[matched]]
+            costs[matched_worlds, agents[matched], :] = UNREACHABLE
+            costs[matched_worlds, :, passengers[matched]] = UNREACHABLE
+
+        starts = self.routes.road_index[agent_locations[..., 1], agent_locations[..., 0]]
+        actions = np.where(targets >= 0, self.routes.next_actions[starts, targets], NOTHING).astype(np.int64)
+        return actions[0] if single else actions
+
+    def predict(self, obs, state=None, episode_start=None, deterministic=True):
+        # Same signature as Stable-Baselines3 models, in the env's action type
+        actions = self.discrete_actions(obs)
+        if self.action_type == "continuous":
+            actions = discrete_to_continuous_action(actions)
+        return actions, None
@@ -0,0 +1,55 @@
+import argparse
+import time
+
+import numpy as np
+
+from hurry_taxi.envs.taxi_grid_vector import TaxiGridVectorEnv
+from hurry_taxi.policies.dispatcher import GreedyDispatcher
+
+
+def collect_dataset(num_envs, steps, seed=0, **env_kwargs):
+    # Runs the dispatcher on a batch of worlds and records every (obs, action)
+    envs = TaxiGridVectorEnv(num_envs, **env_kwargs)
+    dispatcher = GreedyDispatcher(envs)
+    obs_dim = envs.single_observation_space.shape[0]
+    observations = np.empty((steps, num_envs, obs_dim), dtype=np.float32)
+    actions = np.empty((steps, num_envs, envs.agents_number), dtype=envs.single_action_space.dtype)
+    rewards = np.empty((steps, num_envs), dtype=np.float32)
+    obs, _ = envs.reset(seed=seed)
+    for step in range(steps):
+        action, _ = dispatcher.predict(obs)
+        observations[step] = obs
+        actions[step] = action
+        obs, rewards[step], _, _, _ = envs.step(action)
+    return observations.reshape(-1, obs_dim), actions.reshape(-1, envs.agents_number), rewards.reshape(-1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=5, required=False)
+    parser.add_argument("--agents", type=int, default=1, required=False)
+    parser.add_argument("--npcs", type=int, default=0, required=False)
+    parser.add_argument("--max-steps", type=int, default=1000, required=False)
+    parser.add_argument("--envs", type=int, default=256, required=False)
+    parser.add_argument("--steps", type=int, default=1000, required=False)
+    parser.add_argument("--seed", type=int, default=0, required=False)
+    parser.add_argument("--action-type", type=str, default="continuous", required=False, choices=["continuous", "discrete"])
+    parser.add_argument("--output", type=str, default=None, required=False)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    observations, actions, rewards = collect_dataset(
+        args.envs,
+        args.steps,
+        seed=args.seed,
+        grid_size=args.size,
+        agents_number=args.agents,
+        npc_number=args.npcs,
+        max_steps=args.max_steps,
+        action_type=args.action_type,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"{len(observations)} samples in {elapsed:.2f}s ({len(observations) / elapsed:,.0f} samples/s)")
+    print(f"mean reward per step: {rewards.mean():.4f}")
+    if args.output:
+        np.savez(args.output, observations=observations, actions=actions, rewards=rewards)
@@ -1,15 +1,16 @@
 import numpy as np
 
 class Gaussian2D:
-    def __init__(self, mean, cov):
+    def __init__(self, mean, cov, rng=None):
         self.mean = mean
         self.cov = cov
+        self.rng = rng if rng is not None else np.random.default_rng()
 
     def get_sample(self):
-        return np.random.multivariate_normal(self.mean, self.cov)
+        return self.rng.multivariate_normal(self.mean, self.cov)
     
     def get_multiple_samples(self, n):
-        return np.random.multivariate_normal(self.mean, self.cov, n)
+        return self.rng.multivariate_normal(self.mean, self.cov, n)
     
 if __name__ == "__main__":
     mean = [0, 0]
@@ -1,11 +1,45 @@
-import random
+import numpy as np
+
 
 class PositionRandomizer:
-    def __init__(self, grid_size):
+    def __init__(self, grid_size, rng=None, block_size=256):
         self.grid_size = grid_size
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.block_size = block_size
+        self._block = []
+        self._block_state = None
+        self._next = 0
+
+    def uniform(self):
+        # Draw uniforms from the generator in blocks rather than one at a time
+        if self._next == len(self._block):
+            self._block_state = self.rng.bit_generator.state
+            self._block = self.rng.random(self.block_size).tolist()
+            self._next = 0
+        value = self._block[self._next]
+        self._next += 1
+        return value
+
+    def get_state(self):
+        # The generator state the block was drawn from, so it can be redrawn
+        # instead of stored, and the position in it
+        return self._block_state, self._next
+
+    def set_state(self, block_state, position):
+        # Leaves the generator advanced past the block, callers restore its
+        # current state afterwards
+        self._block_state = block_state
+        self._block = []
+        if block_state is not None:
+            self.rng.bit_generator.state = block_state
+            self._block = self.rng.random(self.block_size).tolist()
+        self._next = position
+
+    def choice(self, n):
+        return int(self.uniform() * n)
 
     def discrete_randomize(self):
-        return (random.randint(0, self.grid_size - 1), random.randint(0, self.grid_size - 1))
+        return (self.choice(self.grid_size), self.choice(self.grid_size))
     
     def continuous_randomize(self):
-        return (random.random() * self.grid_size, random.random() * self.grid_size)
\ No newline at end of file
+        return (self.uniform() * self.grid_size, self.uniform() * self.grid_size)
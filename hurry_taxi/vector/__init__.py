@@ -0,0 +1,2 @@
+from hurry_taxi.vector.sb3 import TaxiGridVecEnv
+from hurry_taxi.vector.shared_memory import SharedMemoryVecEnv
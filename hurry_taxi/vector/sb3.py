@@ -0,0 +1,60 @@
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv
+
+from hurry_taxi.envs.taxi_grid_vector import TaxiGridVectorEnv
+
+
+class TaxiGridVecEnv(VecEnv):
+    """Stable-Baselines3 VecEnv over a TaxiGridVectorEnv.
+
+    Finished worlds are reset in the same step and their last observation is
+    returned as info["terminal_observation"], like DummyVecEnv does.
+    """
+
+    def __init__(self, num_envs, **env_kwargs):
+        self.env = TaxiGridVectorEnv(num_envs, **env_kwargs)
+        super().__init__(num_envs, self.env.single_observation_space, self.env.single_action_space)
+        self.actions = None
+
+    def reset(self):
+        options = self._options[0] or None
+        obs, _ = self.env.reset(seed=self._seeds[0], options=options)
+        self._reset_seeds()
+        self._reset_options()
+        return obs
+
+    def step_async(self, actions):
+        self.actions = actions
+
+    def step_wait(self):
+        env = self.env
+        env._step_worlds(env._decode_actions(self.actions))
+        obs = env._observe()
+        rewards = env._rewards.astype(np.float32)
+        dones = env._terminations | env._truncations
+        infos = [{} for _ in range(self.num_envs)]
+        if dones.any():
+            for world in np.flatnonzero(dones):
+                infos[world]["terminal_observation"] = obs[world]
+                infos[world]["TimeLimit.truncated"] = bool(env._truncations[world] and not env._terminations[world])
+            env._reset_worlds(dones)
+            obs = env._observe()
+        return obs, rewards, dones, infos
+
+    def close(self):
+        self.env.close()
+
+    def get_attr(self, attr_name, indices=None):
+        value = getattr(self.env, attr_name)
+        return [value for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        # Every world shares the attributes of the batched env
+        setattr(self.env, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        result = getattr(self.env, method_name)(*method_args, **method_kwargs)
+        return [result for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
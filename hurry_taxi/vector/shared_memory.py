@@ -0,0 +1,166 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv
+
+from hurry_taxi.envs.shared_memory_worker import CALL, CLOSE, STEP, array_layout, run_worker, shared_arrays
+from hurry_taxi.envs.taxi_grid import TaxiGridEnv
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """Stable-Baselines3 VecEnv running TaxiGridEnvs in worker processes.
+
+    Workers write observations, rewards, done flags and per-step event counts
+    straight into arrays in one shared memory block, and are released and
+    awaited through semaphores. Pipes only carry resets, attribute access,
+    method calls and info dicts, which are sent when get_infos() asks for
+    them. Step infos hold terminal_observation and TimeLimit.truncated for
+    finished envs, which are reset in the same step like SubprocVecEnv does.
+    With episode_log set, every env appends its episodes to that file.
+    """
+
+    def __init__(self, num_envs, num_workers=None, start_method=None, episode_log=None, **env_kwargs):
+        probe = TaxiGridEnv(**env_kwargs)
+        observation_space, action_space = probe.observation_space, probe.action_space
+        probe.close()
+
+        layout, size = array_layout(num_envs, observation_space, action_space)
+        self._memory = shared_memory.SharedMemory(create=True, size=size)
+        self._arrays = shared_arrays(self._memory.buf, layout)
+
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        context = mp.get_context(start_method)
+        num_workers = min(num_workers or num_envs, num_envs)
+        self._worker_envs = [list(map(int, indexes)) for indexes in np.array_split(np.arange(num_envs), num_workers)]
+        self._command = context.RawValue("b", STEP)
+        self._starts = [context.Semaphore(0) for _ in range(num_workers)]
+        self._finished = context.Semaphore(0)
+        self._errors = context.RawArray("b", num_workers)
+
+        self.remotes = []
+        self.processes = []
+        for worker_id, env_indexes in enumerate(self._worker_envs):
+            remote, work_remote = context.Pipe()
+            args = (
+                work_remote, self._memory.name, layout, env_indexes, env_kwargs, episode_log,
+                self._command, self._starts[worker_id], self._finished, self._errors, worker_id,
+            )
+            # daemon=True: workers must not outlive a crashed main process
+            process = context.Process(target=run_worker, args=args, daemon=True)
+            process.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+        self.closed = False
+        # Last, as it reads render_mode from the workers
+        super().__init__(num_envs, observation_space, action_space)
+
+    def _release(self, command):
+        self._command.value = command
+        for start in self._starts:
+            start.release()
+
+    def _wait(self):
+        # Ids of the workers that failed, which sent their exception instead
+        # of a result
+        for _ in self._starts:
+            self._finished.acquire()
+        failed = [worker_id for worker_id, error in enumerate(self._errors) if error]
+        for worker_id in failed:
+            self._errors[worker_id] = 0
+        return failed
+
+    def _call(self, name, worker_data):
+        self._release(CALL)
+        for remote, data in zip(self.remotes, worker_data):
+            remote.send((name, data))
+        results = [remote.recv() for remote in self.remotes]
+        failed = self._wait()
+        if failed:
+            raise results[failed[0]]
+        return results
+
+    def _call_envs(self, name, args, indices):
+        # Splits env indices by worker and flattens the answers back in order
+        indices = list(self._get_indices(indices))
+        worker_data = [
+            ([env_indexes.index(index) for index in indices if index in env_indexes], args)
+            for env_indexes in self._worker_envs
+        ]
+        results = {}
+        for env_indexes, (local_indexes, _), values in zip(self._worker_envs, worker_data, self._call(name, worker_data)):
+            for local_index, value in zip(local_indexes, values):
+                results[env_indexes[local_index]] = value
+        return [results[index] for index in indices]
+
+    def reset(self):
+        worker_data = [
+            [(self._seeds[index], self._options[index] or None) for index in env_indexes]
+            for env_indexes in self._worker_envs
+        ]
+        self.reset_infos = [info for infos in self._call("reset", worker_data) for info in infos]
+        self._reset_seeds()
+        self._reset_options()
+        return self._arrays["observations"].copy()
+
+    def step_async(self, actions):
+        np.copyto(self._arrays["actions"], np.asarray(actions).reshape(self._arrays["actions"].shape), casting="unsafe")
+        self._release(STEP)
+
+    def step_wait(self):
+        failed = self._wait()
+        if failed:
+            errors = [self.remotes[worker_id].recv() for worker_id in failed]
+            raise errors[0]
+        arrays = self._arrays
+        # Copies, since the next step overwrites the shared arrays
+        obs = arrays["observations"].copy()
+        rewards = arrays["rewards"].copy()
+        dones = arrays["terminations"] | arrays["truncations"]
+        infos = [{} for _ in range(self.num_envs)]
+        for env_index in np.flatnonzero(dones):
+            infos[env_index]["terminal_observation"] = arrays["terminal_observations"][env_index].copy()
+            infos[env_index]["TimeLimit.truncated"] = bool(
+                arrays["truncations"][env_index] and not arrays["terminations"][env_index]
+            )
+        return obs, rewards, dones, infos
+
+    @property
+    def event_counts(self):
+        # Events of the last step per env, indexed by Events value
+        return self._arrays["event_counts"].copy()
+
+    def get_infos(self):
+        # Info dicts of each env's last step or reset
+        return [info for worker_infos in self._call("get_infos", [None] * len(self.remotes)) for info in worker_infos]
+
+    def get_images(self):
+        return self.env_method("render")
+
+    def close(self):
+        if self.closed:
+            return
+        self._release(CLOSE)
+        for process in self.processes:
+            process.join()
+        for remote in self.remotes:
+            remote.close()
+        self._arrays = None
+        self._memory.close()
+        self._memory.unlink()
+        self.closed = True
+
+    def get_attr(self, attr_name, indices=None):
+        return self._call_envs("get_attr", attr_name, indices)
+
+    def set_attr(self, attr_name, value, indices=None):
+        self._call_envs("set_attr", (attr_name, value), indices)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return self._call_envs("env_method", (method_name, method_args, method_kwargs), indices)
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        # Workers run bare TaxiGridEnvs
+        return [False for _ in self._get_indices(indices)]
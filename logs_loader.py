@@ -1,32 +1,94 @@
 import os
+import numpy as np
 import pandas as pd
 
+from hurry_taxi.monitoring import episode_log_path, load_episode_log, summary_path, update_summary
+from hurry_taxi.monitoring.log_reader import get_reader
+
 
 class LogsLoader:
+    # Frames built from each reader, reused until it reads new rows
+    _frames = {}
+
+    @staticmethod
+    def run_name(model, size, steps, agents, npcs):
+        return f"{model}_{size}_{steps}_{agents}_{npcs}"
+
+    @staticmethod
+    def load_episodes(model, size, steps, agents, npcs):
+        # Memory-mapped episode records of every worker of a run
+        return load_episode_log(episode_log_path("logs", LogsLoader.run_name(model, size, steps, agents, npcs)))
+
+    @staticmethod
+    def _cached(path, build):
+        reader = get_reader(path)
+        reader.update()
+        key = (path, build.__name__)
+        cached = LogsLoader._frames.get(key)
+        if cached is None or cached[0] != reader.version:
+            cached = (reader.version, build(reader.columns()))
+            LogsLoader._frames[key] = cached
+        return cached[1]
+
+    @staticmethod
+    def _frame(columns):
+        return pd.DataFrame({"l": columns.get("l", []), "r": columns.get("r", [])})
+
+    @staticmethod
+    def _worker_frames(columns):
+        if not columns:
+            return []
+        workers = columns["worker"]
+        return [
+            pd.DataFrame({"l": columns["l"][workers == worker], "r": columns["r"][workers == worker]})
+            for worker in np.unique(workers)
+        ]
+
     @staticmethod
     def load_data(models, size, steps, agents, npcs):
+        # Runs logged before episode logs existed still come from Monitor CSVs
         data = {}
         for model in models:
-            path = os.path.join(
-                "logs", f"{model}_{size}_{steps}_{agents}_{npcs}.monitor.csv"
-            )
-            model_data = pd.read_csv(path, skiprows=1, usecols=["l", "r"])
-            data[model] = model_data
+            run_name = LogsLoader.run_name(model, size, steps, agents, npcs)
+            path = episode_log_path("logs", run_name)
+            if not os.path.exists(path):
+                path = os.path.join("logs", f"{run_name}.monitor.csv")
+            data[model] = LogsLoader._cached(path, LogsLoader._frame)
         return data
 
     @staticmethod
     def load_vectorized_logs(model, size, episode_steps, agents, npcs):
+        run_name = LogsLoader.run_name(model, size, episode_steps, agents, npcs)
+        path = episode_log_path("logs", run_name)
+        if os.path.exists(path):
+            return LogsLoader._cached(path, LogsLoader._worker_frames)
+
         logs = []
-        path = os.path.join("logs", f"{model}_{size}_{episode_steps}_{agents}_{npcs}")
-        for file in os.listdir(path):
+        path = os.path.join("logs", run_name)
+        for file in sorted(os.listdir(path)):
             if file.endswith(".monitor.csv"):
-                logs.append(
-                    pd.read_csv(
-                        os.path.join(path, file), skiprows=1, usecols=["l", "r"]
-                    )
-                )
+                logs.append(LogsLoader._cached(os.path.join(path, file), LogsLoader._frame))
         return logs
 
+    @staticmethod
+    def load_summary(model, size, episode_steps, agents, npcs, bucket_steps=None):
+        # Learning curve statistics of a run, saved next to its logs and
+        # brought up to date by reading only the episodes logged since
+        run_name = LogsLoader.run_name(model, size, episode_steps, agents, npcs)
+        sources = [episode_log_path("logs", run_name)]
+        if not os.path.exists(sources[0]):
+            path = os.path.join("logs", run_name)
+            sources = [os.path.join(path, file) for file in sorted(os.listdir(path)) if file.endswith(".monitor.csv")]
+        summary = update_summary(summary_path("logs", run_name), sources, bucket_steps or episode_steps)
+        return summary.statistics()
+
+    @staticmethod
+    def stream(model, size, steps, agents, npcs, interval=2.0, idle_timeout=None):
+        # Frames of the episodes a running experiment appends to its log
+        path = episode_log_path("logs", LogsLoader.run_name(model, size, steps, agents, npcs))
+        for rows in get_reader(path).follow(interval, idle_timeout):
+            yield pd.DataFrame(rows)
+
 
 if __name__ == "__main__":
     ppo_logs = LogsLoader.load_vectorized_logs("ppo", 5, 5000, 1, 0)
@@ -7,23 +7,23 @@ import pygame
 def handle_player_input():
     global quit_game
     keys = pygame.key.get_pressed()
-    action = [1, 1]
+    action = [Actions.nothing.value, Actions.nothing.value]
     if keys[pygame.K_RIGHT]:
-        action[1] = -1
+        action[1] = Actions.right.value
     if keys[pygame.K_UP]:
-        action[1] = -0.5
+        action[1] = Actions.up.value
     if keys[pygame.K_LEFT]:
-        action[1] = 0
+        action[1] = Actions.left.value
     if keys[pygame.K_DOWN]:
-        action[1] = 0.5
+        action[1] = Actions.down.value
     if keys[pygame.K_d]:
-        action[0] = -1
+        action[0] = Actions.right.value
     if keys[pygame.K_w]:
-        action[0] = -0.5
+        action[0] = Actions.up.value
     if keys[pygame.K_a]:
-        action[0] = 0
+        action[0] = Actions.left.value
     if keys[pygame.K_s]:
-        action[0] = 0.5
+        action[0] = Actions.down.value
     if keys[pygame.K_ESCAPE]:
         quit_game = True
 
@@ -35,7 +35,7 @@ def handle_player_input():
 
 
 quit_game = False
-env = gymnasium.make("hurry_taxi/TaxiGrid-v0", render_mode="human")
+env = gymnasium.make("hurry_taxi/TaxiGrid-v0", render_mode="human", action_type="discrete")
 observation, info = env.reset()
 done = False
 while not done and not quit_game:
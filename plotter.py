@@ -37,6 +37,23 @@ class Plotter:
         plt.ylabel("Return")
         plt.savefig(os.path.join("imgs", f"return_{size}_{steps}_{agents}_{npcs}.png"))
 
+    @staticmethod
+    def line_plot_from_summary(stats, size, steps, agents, npcs):
+        # Same curve as line_plot_with_bands, from CurveSummary.statistics(),
+        # with the 10th to 90th percentile band behind the standard deviation
+        plt.figure(figsize=(10, 6))
+        plt.plot(stats["steps"], stats["mean"])
+        plt.fill_between(
+            stats["steps"],
+            stats["mean"] - stats["std"],
+            stats["mean"] + stats["std"],
+            alpha=0.2,
+        )
+        plt.fill_between(stats["steps"], stats["quantiles"][0], stats["quantiles"][-1], alpha=0.1)
+        plt.xlabel("Training Steps")
+        plt.ylabel("Return")
+        plt.savefig(os.path.join("imgs", f"return_{size}_{steps}_{agents}_{npcs}.png"))
+
 
 if __name__ == "__main__":
     plotter = Plotter()
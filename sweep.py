@@ -0,0 +1,120 @@
+import argparse
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from training import ALGORITHMS, VEC_ENVS, config_hash, expand_grid, is_done, run_name, train
+
+THREAD_VARIABLES = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def pin_threads(threads):
+    # Runs first in every pool process, before torch is imported, so jobs
+    # do not each start a thread per core
+    for variable in THREAD_VARIABLES:
+        os.environ[variable] = str(threads)
+    import torch
+
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(threads)
+
+
+def job_cores(config, threads):
+    # Cores a run keeps busy: its torch threads, plus one per env when the
+    # envs step in their own processes
+    if config["num_envs"] > 1:
+        return threads + config["num_envs"]
+    return threads
+
+
+def run_job(config):
+    start = time.perf_counter()
+    train(config)
+    return config, time.perf_counter() - start
+
+
+def run(configs, cores, threads, jobs=None):
+    # Starts runs while the cores they need fit in the budget. A run that
+    # needs more than the whole budget runs alone.
+    pending = [config for config in configs if not is_done(config)]
+    for config in configs:
+        if config not in pending:
+            print(f"skip  {run_name(config)} ({config_hash(config)})")
+    if not pending:
+        return []
+
+    # Spawned pool processes start without the parent's torch threads
+    context = mp.get_context("spawn")
+    finished = []
+    jobs = jobs or cores
+    running = {}
+    with ProcessPoolExecutor(jobs, mp_context=context, initializer=pin_threads, initargs=(threads,)) as pool:
+        while pending or running:
+            busy = sum(job_cores(config, threads) for config in running.values())
+            for config in list(pending):
+                if len(running) >= jobs:
+                    break
+                needed = job_cores(config, threads)
+                if running and busy + needed > cores:
+                    continue
+                pending.remove(config)
+                running[pool.submit(run_job, config)] = config
+                busy += needed
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                config = running.pop(future)
+                try:
+                    _, seconds = future.result()
+                except Exception as error:
+                    print(f"fail  {run_name(config)}: {error!r}")
+                    continue
+                finished.append(config)
+                print(f"done  {run_name(config)} ({config_hash(config)}) in {seconds:.0f} s")
+    return finished
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--algorithms", type=str, nargs="+", default=ALGORITHMS, required=False, choices=ALGORITHMS)
+    parser.add_argument("--steps", type=int, nargs="+", default=[1000], required=False)
+    parser.add_argument("--size", type=int, nargs="+", default=[25], required=False, choices=[5, 10, 25])
+    parser.add_argument("--agents", type=int, nargs="+", default=[4], required=False)
+    parser.add_argument("--npcs", type=int, nargs="+", default=[4], required=False)
+    parser.add_argument("--timesteps", type=int, default=None, required=False)
+    parser.add_argument("--num-envs", type=int, default=None, required=False)
+    parser.add_argument("--vec-env", type=str, default="subproc", required=False, choices=VEC_ENVS)
+    parser.add_argument("--train-freq", type=int, default=None, required=False)
+    parser.add_argument("--gradient-steps", type=int, default=None, required=False)
+    parser.add_argument("--action-noise", type=float, default=None, required=False)
+    parser.add_argument("--threads", type=int, default=1, required=False)
+    parser.add_argument("--cores", type=int, default=None, required=False)
+    parser.add_argument("--jobs", type=int, default=None, required=False)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    configs = expand_grid(
+        args.algorithms,
+        args.steps,
+        args.size,
+        args.agents,
+        args.npcs,
+        timesteps=args.timesteps,
+        num_envs=args.num_envs,
+        vec_env=args.vec_env,
+        train_freq=args.train_freq,
+        gradient_steps=args.gradient_steps,
+        action_noise=args.action_noise,
+    )
+    if args.dry_run:
+        for config in configs:
+            print(f"{'skip' if is_done(config) else 'run '}  {run_name(config)} ({config_hash(config)})")
+    else:
+        run(configs, args.cores or available_cores(), args.threads, args.jobs)
@@ -0,0 +1,207 @@
+import hashlib
+import itertools
+import json
+import os
+from functools import partial
+
+import gymnasium as gym
+import numpy as np
+
+import hurry_taxi
+from hurry_taxi.monitoring import EpisodeLogger, episode_log_path, summary_path
+
+ALGORITHMS = ["a2c", "ppo", "sac", "td3"]
+OFF_POLICY = ["sac", "td3"]
+VEC_ENVS = ["subproc", "shared_memory"]
+CONFIG_SUFFIX = ".config.json"
+
+
+def add_env_arguments(parser):
+    parser.add_argument("--steps", type=int, default=1000, required=False)
+    parser.add_argument("--size", type=int, default=25, required=False, choices=[5, 10, 25])
+    parser.add_argument("--agents", type=int, default=4, required=False)
+    parser.add_argument("--npcs", type=int, default=4, required=False)
+
+
+def add_off_policy_arguments(parser):
+    # Defaults of None are filled in by make_config
+    parser.add_argument("--num-envs", type=int, default=None, required=False)
+    parser.add_argument("--train-freq", type=int, default=None, required=False)
+    parser.add_argument("--gradient-steps", type=int, default=None, required=False)
+    parser.add_argument("--action-noise", type=float, default=None, required=False)
+
+
+def run_name(config):
+    return f"{config['algorithm']}_{config['size']}_{config['steps']}_{config['agents']}_{config['npcs']}"
+
+
+def make_config(
+    algorithm,
+    steps,
+    size,
+    agents,
+    npcs,
+    timesteps=None,
+    num_envs=None,
+    vec_env="subproc",
+    train_freq=None,
+    gradient_steps=None,
+    action_noise=None,
+):
+    # Every setting a run depends on, with each algorithm's defaults filled
+    # in, so the config hash changes whenever the trained model would
+    if algorithm == "ppo":
+        num_envs = num_envs or 16
+        timesteps = timesteps or 15000000
+    elif algorithm in OFF_POLICY:
+        # Envs step together and fill one replay buffer. train_freq counts
+        # steps of every env, so by default each round of num_envs
+        # transitions is followed by num_envs gradient steps, keeping the one
+        # update per transition of a single env.
+        num_envs = num_envs or 8
+        timesteps = timesteps or 25 * steps
+    else:
+        num_envs = num_envs or 1
+        timesteps = timesteps or 25 * steps
+    config = dict(
+        algorithm=algorithm,
+        steps=steps,
+        size=size,
+        agents=agents,
+        npcs=npcs,
+        timesteps=timesteps,
+        num_envs=num_envs,
+        vec_env=vec_env,
+    )
+    if algorithm in OFF_POLICY:
+        train_freq = train_freq or 1
+        config.update(
+            train_freq=train_freq,
+            gradient_steps=gradient_steps or train_freq * num_envs,
+            action_noise=action_noise if action_noise is not None else (0.01 if algorithm == "td3" else 0.0),
+        )
+    return config
+
+
+def expand_grid(algorithms, steps, sizes, agents, npcs, **settings):
+    return [
+        make_config(algorithm, step, size, agent, npc, **settings)
+        for algorithm, step, size, agent, npc in itertools.product(algorithms, steps, sizes, agents, npcs)
+    ]
+
+
+def config_hash(config):
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def run_paths(config, models="models", logs="logs"):
+    name = run_name(config)
+    return {
+        "model": os.path.join(models, name + ".zip"),
+        "config": os.path.join(models, name + CONFIG_SUFFIX),
+        "episodes": episode_log_path(logs, name),
+        "summary": summary_path(logs, name),
+    }
+
+
+def is_done(config, models="models", logs="logs"):
+    # A run is done when its model and episode log exist and were produced
+    # by a config with the same hash
+    paths = run_paths(config, models, logs)
+    if not all(os.path.exists(paths[name]) for name in ["model", "episodes", "config"]):
+        return False
+    with open(paths["config"]) as file:
+        return json.load(file).get("hash") == config_hash(config)
+
+
+def make_env(config, path, worker_id=0):
+    env = gym.make(
+        "hurry_taxi/TaxiGrid-v0",
+        max_steps=config["steps"],
+        agents_number=config["agents"],
+        npc_number=config["npcs"],
+        grid_size=config["size"],
+    )
+    return EpisodeLogger(env, path, worker_id=worker_id)
+
+
+def make_vec_env(config, path):
+    from stable_baselines3.common.vec_env import SubprocVecEnv, VecMonitor
+
+    from hurry_taxi.vector import SharedMemoryVecEnv
+
+    if config["vec_env"] == "shared_memory":
+        env = SharedMemoryVecEnv(
+            config["num_envs"],
+            max_steps=config["steps"],
+            agents_number=config["agents"],
+            npc_number=config["npcs"],
+            grid_size=config["size"],
+            episode_log=path,
+        )
+        # Only for the episode stats of the training log, episodes are
+        # written by the workers
+        return VecMonitor(env)
+    return SubprocVecEnv([partial(make_env, config, path, worker_id) for worker_id in range(config["num_envs"])])
+
+
+def make_action_noise(config, env):
+    # Ornstein-Uhlenbeck noise on every action dimension, with its own
+    # process for each env so their noise is not shared
+    from stable_baselines3.common.noise import OrnsteinUhlenbeckActionNoise, VectorizedActionNoise
+
+    if not config["action_noise"]:
+        return None
+    n_actions = env.action_space.shape[-1]
+    noise = OrnsteinUhlenbeckActionNoise(mean=np.zeros(n_actions), sigma=config["action_noise"] * np.ones(n_actions))
+    if config["num_envs"] > 1:
+        return VectorizedActionNoise(noise, config["num_envs"])
+    return noise
+
+
+def make_model(config, env):
+    import stable_baselines3
+
+    if config["algorithm"] == "ppo":
+        return stable_baselines3.PPO(
+            "MlpPolicy",
+            env,
+            verbose=1,
+            gamma=0.99,
+            learning_rate=0.00001,
+            device="cpu",
+            policy_kwargs=dict(net_arch=[256, 256]),
+        )
+    algorithm = getattr(stable_baselines3, config["algorithm"].upper())
+    if config["algorithm"] in OFF_POLICY:
+        return algorithm(
+            "MlpPolicy",
+            env,
+            verbose=1,
+            train_freq=config["train_freq"],
+            gradient_steps=config["gradient_steps"],
+            action_noise=make_action_noise(config, env),
+        )
+    return algorithm("MlpPolicy", env, verbose=1)
+
+
+def train(config, models="models", logs="logs"):
+    paths = run_paths(config, models, logs)
+    # Episode logs are appended to, so a rerun starts from empty ones
+    for name in ["episodes", "summary", "config"]:
+        if os.path.exists(paths[name]):
+            os.remove(paths[name])
+
+    if config["num_envs"] > 1:
+        env = make_vec_env(config, paths["episodes"])
+    else:
+        env = make_env(config, paths["episodes"])
+    model = make_model(config, env)
+    model.learn(total_timesteps=config["timesteps"], log_interval=10)
+    os.makedirs(models, exist_ok=True)
+    model.save(paths["model"])
+    env.close()
+
+    with open(paths["config"], "w") as file:
+        json.dump(dict(config, hash=config_hash(config)), file, indent=2, sort_keys=True)
+    return paths
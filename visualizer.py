@@ -1,19 +1,12 @@
 import hurry_taxi
-from hurry_taxi.envs.taxi_grid import Actions
-import numpy as np
+from hurry_taxi.envs.taxi_grid import Actions, continuous_to_discrete_actions
 import os
 import gymnasium as gym
 from stable_baselines3 import PPO
 
 
 def parse_action(actions):
-    discrete_actions = []
-    for action in actions:
-        discrete_action = int(
-            np.clip((action + 1) * (len(Actions) - 1) / 2, 0, len(Actions) - 1)
-        )
-        discrete_actions.append(discrete_action)
-    return [Actions(action) for action in discrete_actions]
+    return [Actions(int(action)) for action in continuous_to_discrete_actions(actions)]
 
 
 steps = 5000